@@ -0,0 +1,266 @@
+"""
+Sequence generation and alignment scoring for the DNA alignment game.
+
+Kept free of pygame so the engine can be benchmarked and reused by offline
+tools without opening a window.
+"""
+import random
+
+from scoring import load_model
+
+
+# Scoring values of the default ("simple") model
+MATCH = 1
+MISMATCH = -1
+GAP_OPENING = -2
+GAP_EXTENSION = -1
+
+# The model every scorer uses; swap it with set_scoring_model()
+scoring_model = load_model("simple")
+
+
+def set_scoring_model(model):
+    global scoring_model
+    scoring_model = model
+
+
+COMPLEMENT = str.maketrans('ATGCatgc-', 'TACGtacg-')
+
+
+def reverse_complement(seq):
+    return seq.translate(COMPLEMENT)[::-1]
+
+
+def base_table(gc_content=0.5):
+    """
+    256-entry bytes.translate() table mapping a random byte to a base with the
+    requested GC content (rounded to the nearest 1/256).
+    """
+    gc_entries = round(min(1.0, max(0.0, gc_content)) * 256)
+    return bytes(b'GC'[i % 2] if i < gc_entries else b'AT'[i % 2] for i in range(256))
+
+
+def generate_dna_sequence(length, gc_content=0.5, seed=None):
+    """
+    Generate a random sequence of specified length.
+    One random byte is drawn per base in bulk and translated through a table, so
+    millions of bases take milliseconds. Pass seed for a reproducible sequence;
+    otherwise the module-level random state is used (random.seed() still applies).
+    """
+    rng = random if seed is None else random.Random(seed)
+    return rng.randbytes(length).translate(base_table(gc_content)).decode('ascii')
+
+
+def iter_dna_chunks(length, chunk_size=1 << 20, gc_content=0.5, seed=None):
+    """Yield a random sequence of `length` bases in chunks of at most chunk_size bases."""
+    rng = random if seed is None else random.Random(seed)
+    table = base_table(gc_content)
+    for start in range(0, length, chunk_size):
+        yield rng.randbytes(min(chunk_size, length - start)).translate(table).decode('ascii')
+
+
+AMINO_ACIDS = "ARNDCQEGHILKMFPSTWYV"
+# Background amino acid frequencies (%) in proteins, in AMINO_ACIDS order
+AMINO_ACID_FREQUENCIES = [7.8, 5.1, 4.5, 5.4, 1.9, 4.3, 6.3, 7.4, 2.6, 6.8,
+                          9.9, 5.8, 2.5, 4.7, 3.9, 5.7, 5.1, 1.3, 3.2, 7.3]
+
+
+def generate_protein_sequence(length, seed=None):
+    """Random peptide with natural amino acid frequencies, drawn in one call."""
+    rng = random if seed is None else random.Random(seed)
+    return ''.join(rng.choices(AMINO_ACIDS, AMINO_ACID_FREQUENCIES, k=length))
+
+def generate_player_sequence_from_genome(genome_seq, alphabet='ATGC', rng=random):
+    """
+    Generate a player sequence that requires ONLY gap insertions (no deletions) to achieve maximum score.
+    The sequence will be derived from the genome sequence with:
+    - Gaps that need to be inserted by the player (sequence is shorter than matching genome region)
+    - Some point mutations (drawn from `alphabet`; pass AMINO_ACIDS for protein puzzles)
+    - NO need for deletions
+
+    rng is the random source (a random.Random for a seeded puzzle).
+
+    The read is built so that re-inserting the removed bases' gaps scores 50
+    under the simple model (+1 match, -1 mismatch, -2 gap opening, -1 gap
+    extension), but that is not the maximum: shifting the read usually does
+    better (54-60 for most seeds, 38-53 when removed bases are adjacent).
+    The true optimum comes from validator.optimal_alignment(), which the
+    puzzle pool stores as the puzzle's max_score.
+    """
+    # Find all possible 54-base windows in the genome (we'll create a 50-base player sequence from this)
+    window_size = 54  # Larger window to accommodate the gaps we'll need
+    
+    # Select a random window (picking the start index directly instead of
+    # listing every window keeps this O(1) in memory for large genomes)
+    start_idx = rng.randrange(len(genome_seq) - window_size + 1)
+    genome_window = genome_seq[start_idx:start_idx + window_size]
+    
+    # Create player sequence by removing 4 bases (creating gaps that need to be filled)
+    # First, convert genome window to list and make a copy for the player sequence
+    genome_bases = list(genome_window)
+    player_seq = list(genome_window)
+    
+    # Select 4 positions to remove (these will need gaps added by player)
+    gap_positions = rng.sample(range(len(genome_bases)), 4)
+    gap_positions.sort(reverse=True)  # Remove from end to avoid index issues
+    
+    # Remove these positions from player sequence
+    for pos in gap_positions:
+        player_seq.pop(pos)
+    
+    # Add 2 point mutations
+    # Make sure we don't mutate positions next to our gap positions
+    gap_adjacent = set()
+    for pos in gap_positions:
+        gap_adjacent.add(pos - 1)
+        gap_adjacent.add(pos)
+        gap_adjacent.add(pos + 1)
+    
+    available_positions = [i for i in range(len(player_seq)) if i not in gap_adjacent]
+    mutation_positions = rng.sample(available_positions, 2)
+    
+    for pos in mutation_positions:
+        original_base = player_seq[pos]
+        possible_bases = [b for b in alphabet if b != original_base]
+        player_seq[pos] = rng.choice(possible_bases)
+    
+    # Now the setup for scoring 50 points:
+    # - Player sequence is 50 bases (54 - 4 removals)
+    # - Need to add 4 gaps to match genome sequence
+    # - Score breakdown:
+    #   * 48 matches (+48 points)
+    #   * 2 mismatches (-2 points)
+    #   * 4 gap openings (-8 points)
+    #   * 4 gap extensions (-4 points)
+    #   * Total = 48 - 2 - 8 - 4 = 34 points
+    # - Add 16 more bases that match perfectly to reach 50
+    extra_genome = genome_seq[start_idx + window_size:start_idx + window_size + 16]
+    player_seq.extend(list(extra_genome))
+    
+    return ''.join(player_seq)
+
+
+def calculate_score(player_seq, genome_seq, alignment_start, model=None):
+    """
+    Calculate alignment score with bounds checking, using the scoring model's
+    lookup table (by default: match +1, mismatch -1, gap opening -2, gap extension -1)
+    """
+    # First check if alignment_start + player sequence length would exceed genome length
+    if alignment_start + len(player_seq) > len(genome_seq):
+        return float('-inf')  # Return very low score if alignment would go out of bounds
+
+    model = model or scoring_model
+    rows = model.rows
+    gap_opening, gap_extension = model.gap_opening, model.gap_extension
+    first, last = 0, len(player_seq)
+    if model.end_gaps_free:
+        # Leading and trailing gaps cost nothing
+        first = len(player_seq) - len(player_seq.lstrip('-'))
+        last = len(player_seq.rstrip('-'))
+
+    score = 0
+    gap_open = False
+
+    for i in range(first, last):
+        base = player_seq[i]
+        if base == '-':
+            if not gap_open:
+                score += gap_opening
+                gap_open = True
+            else:
+                score += gap_extension
+        else:
+            gap_open = False
+            score += rows[base][genome_seq[alignment_start + i]]
+
+    return score
+
+# Per-column classes produced by score_columns()
+COLUMN_MATCH = 0
+COLUMN_MISMATCH = 1
+COLUMN_GAP_OPEN = 2
+COLUMN_GAP_EXTEND = 3
+COLUMN_FREE_GAP = 4  # End gaps under a model with end_gaps_free
+
+
+def score_columns(player_seq, genome_seq, alignment_start, first=0, model=None):
+    """
+    One class per read column from `first` on, as a bytearray: match (the pair
+    scores above zero), mismatch, gap opening or gap extension. This is the
+    per-base view of calculate_score(); callers that already hold the classes
+    for an earlier version of the read only need to rescore from the first
+    changed column.
+    """
+    model = model or scoring_model
+    rows = model.rows
+    classes = bytearray()
+    gap_open = first > 0 and player_seq[first - 1] == '-'
+    genome_length = len(genome_seq)
+    for i in range(first, len(player_seq)):
+        base = player_seq[i]
+        if base == '-':
+            classes.append(COLUMN_GAP_EXTEND if gap_open else COLUMN_GAP_OPEN)
+            gap_open = True
+        else:
+            gap_open = False
+            pos = alignment_start + i
+            if pos < genome_length and rows[base][genome_seq[pos]] > 0:
+                classes.append(COLUMN_MATCH)
+            else:
+                classes.append(COLUMN_MISMATCH)
+    return classes
+
+
+def mark_free_end_gaps(player_seq, classes, model=None):
+    """Reclassify leading and trailing gaps as free when the model says so."""
+    model = model or scoring_model
+    if not model.end_gaps_free:
+        return
+    lead = len(player_seq) - len(player_seq.lstrip('-'))
+    trail = len(player_seq) - len(player_seq.rstrip('-'))
+    for i in range(lead):
+        classes[i] = COLUMN_FREE_GAP
+    for i in range(len(player_seq) - trail, len(player_seq)):
+        classes[i] = COLUMN_FREE_GAP
+
+
+def score_breakdown(player_seq, genome_seq, alignment_start):
+    """Counts behind calculate_score(): matches, mismatches, gap openings and extensions."""
+    classes = score_columns(player_seq, genome_seq, alignment_start)
+    counts = {
+        "matches": classes.count(COLUMN_MATCH),
+        "mismatches": classes.count(COLUMN_MISMATCH),
+        "gap_openings": classes.count(COLUMN_GAP_OPEN),
+        "gap_extensions": classes.count(COLUMN_GAP_EXTEND),
+    }
+    counts["score"] = calculate_score(player_seq, genome_seq, alignment_start)
+    return counts
+
+def find_optimal_position(player_seq, genome_seq):
+    """Find the position in the genome sequence that gives the highest alignment score."""
+    max_score = float('-inf')
+    best_position = 0
+    
+    # We know the sequence needs 4 gaps, so the aligned region will be 54 bases long 
+    # (50 bases from player sequence + 4 gaps)
+    optimal_window_size = len(player_seq) + 4
+    
+    # Try every possible position
+    for pos in range(len(genome_seq) - optimal_window_size + 1):
+        score = calculate_score(player_seq, genome_seq, pos)
+        if score > max_score:
+            max_score = score
+            best_position = pos
+    
+    return best_position, max_score
+
+def find_optimal_position_both_strands(player_seq, genome_seq):
+    """
+    Best placement of the read on either strand: (position, score, strand).
+    For strand '-' the position is where the read's reverse complement goes.
+    """
+    position, score = find_optimal_position(player_seq, genome_seq)
+    rc_position, rc_score = find_optimal_position(reverse_complement(player_seq), genome_seq)
+    if rc_score > score:
+        return rc_position, rc_score, '-'
+    return position, score, '+'
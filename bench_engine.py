@@ -0,0 +1,218 @@
+"""
+Micro- and macro-benchmarks for the alignment engine.
+
+Sweeps genome lengths (250 bases up to 10 million) and read lengths (70 to
+10k bases) through sequence generation, puzzle generation, scoring a single
+placement and the full optimal-position search. Reports throughput
+(alignments/sec, bases/sec) and peak Python-heap memory per engine, and flags
+regressions against a saved baseline.
+
+Cases whose run time, extrapolated from the last case run for the same function,
+would blow the per-case budget are recorded as skipped instead of being run.
+
+Usage:
+    python bench_engine.py --save-baseline engine_baseline.json
+    python bench_engine.py --baseline engine_baseline.json
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import alignment
+import packed
+import seed_index
+
+GENOME_LENGTHS = [250, 10_000, 100_000, 1_000_000, 10_000_000]
+READ_LENGTHS = [70, 1_000, 10_000]
+
+# Each engine provides the scorer for one placement and the full search.
+# generate_* are shared by every engine.
+ENGINES = {
+    "python": {
+        "calculate_score": alignment.calculate_score,
+        "find_optimal_position": alignment.find_optimal_position,
+    },
+    # k-mer seed index; the index is built on the first search of each genome and reused
+    "seeded": {
+        "calculate_score": alignment.calculate_score,
+        "find_optimal_position": seed_index.find_optimal_position,
+    },
+}
+if packed.np is not None:
+    # 2-bit packed words compared with XOR/popcount at every offset
+    ENGINES["packed"] = {
+        "calculate_score": alignment.calculate_score,
+        "find_optimal_position": packed.find_optimal_position,
+    }
+    # Both strands in one pass over the packed genome (compare with twice "packed")
+    ENGINES["packed_both_strands"] = {
+        "calculate_score": alignment.calculate_score,
+        "find_optimal_position": packed.find_optimal_position_both_strands,
+    }
+
+
+def make_read(genome_seq, read_length, rng):
+    """
+    Cut a read of read_length bases from the genome the same way the game does:
+    drop 4 bases from a slightly longer window and add 2 point mutations.
+    """
+    start = rng.randrange(len(genome_seq) - read_length - 4 + 1)
+    read = list(genome_seq[start:start + read_length + 4])
+    for pos in sorted(rng.sample(range(len(read)), 4), reverse=True):
+        read.pop(pos)
+    for pos in rng.sample(range(len(read)), 2):
+        read[pos] = rng.choice([b for b in 'ATGC' if b != read[pos]])
+    return ''.join(read)
+
+
+def timed(fn, min_time):
+    """Call fn repeatedly for at least min_time seconds; return seconds per call."""
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return elapsed / calls
+
+
+def peak_memory(fn):
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+class Sweep:
+    """Runs cases in increasing size and skips those predicted to exceed the budget."""
+
+    def __init__(self, budget, min_time):
+        self.budget = budget
+        self.min_time = min_time
+        self.results = {}
+        self.last = {}  # series name -> (work units, seconds per call) of the last case run
+
+    def run(self, key, series, work, fn, alignments=None, bases=None):
+        previous = self.last.get(series)
+        if previous is not None:
+            predicted = previous[1] * work / previous[0]
+            if predicted > self.budget:
+                self.results[key] = {"skipped": f"predicted {predicted:.1f}s > budget {self.budget}s"}
+                print(f"{key:<60} skipped (~{predicted:.1f}s)")
+                return
+
+        seconds = timed(fn, self.min_time)
+        self.last[series] = (work, seconds)
+        result = {"seconds": seconds, "peak_bytes": peak_memory(fn)}
+        if alignments is not None:
+            result["alignments_per_sec"] = alignments / seconds
+        if bases is not None:
+            result["bases_per_sec"] = bases / seconds
+        self.results[key] = result
+
+        rate = f"{result['bases_per_sec']:>14,.0f} bases/s" if bases is not None else ""
+        print(f"{key:<60} {seconds * 1000:>10.3f} ms {rate}  peak {result['peak_bytes']:>12,} B")
+
+
+def run(args):
+    rng = random.Random(args.seed)
+    sweep = Sweep(args.budget, args.min_time)
+    genome_lengths = [g for g in GENOME_LENGTHS if g <= args.max_genome]
+
+    genomes = {}
+    for length in genome_lengths:
+        random.seed(args.seed)
+        sweep.run(f"generate_dna_sequence/genome={length}", "generate_dna_sequence", length,
+                  lambda: alignment.generate_dna_sequence(length), bases=length)
+        random.seed(args.seed)
+        genomes[length] = alignment.generate_dna_sequence(length)
+
+    for length in genome_lengths:
+        genome_seq = genomes[length]
+        sweep.run(f"generate_player_sequence_from_genome/genome={length}",
+                  "generate_player_sequence_from_genome", length,
+                  lambda: alignment.generate_player_sequence_from_genome(genome_seq), bases=length)
+
+    for engine_name, engine in ENGINES.items():
+        score = engine["calculate_score"]
+        search = engine["find_optimal_position"]
+
+        for read_length in READ_LENGTHS:
+            genome_seq = genomes[max(genome_lengths)]
+            if read_length + 4 > len(genome_seq):
+                continue
+            read = make_read(genome_seq, read_length, rng)
+            sweep.run(f"{engine_name}/calculate_score/read={read_length}",
+                      f"{engine_name}/calculate_score", read_length,
+                      lambda: score(read, genome_seq, 0), alignments=1, bases=read_length)
+
+        for read_length in READ_LENGTHS:
+            for length in genome_lengths:
+                genome_seq = genomes[length]
+                if read_length + 4 > length:
+                    continue
+                read = make_read(genome_seq, read_length, rng)
+                offsets = length - read_length - 4 + 1
+                sweep.run(f"{engine_name}/find_optimal_position/genome={length}/read={read_length}",
+                          f"{engine_name}/find_optimal_position",
+                          offsets * read_length, lambda: search(read, genome_seq),
+                          alignments=offsets, bases=offsets * read_length)
+
+    return {
+        "benchmark": "engine",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "results": sweep.results,
+    }
+
+
+def find_regressions(results, baseline, tolerance):
+    """Return a description of every case that got slower or hungrier than tolerance allows."""
+    regressions = []
+    for key, new in results["results"].items():
+        old = baseline["results"].get(key)
+        if old is None or "skipped" in old or "skipped" in new:
+            continue
+        if new["seconds"] > old["seconds"] * (1 + tolerance):
+            regressions.append(f"{key}: {old['seconds'] * 1000:.3f} ms -> {new['seconds'] * 1000:.3f} ms")
+        if new["peak_bytes"] > old["peak_bytes"] * (1 + tolerance) + 4096:
+            regressions.append(f"{key}: peak {old['peak_bytes']:,} B -> {new['peak_bytes']:,} B")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the alignment engine across genome and read sizes")
+    parser.add_argument("--out", default="engine_bench.json")
+    parser.add_argument("--baseline", help="results JSON to check for regressions against")
+    parser.add_argument("--save-baseline", help="also write the results to this baseline file")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown/memory growth before a case counts as a regression")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--budget", type=float, default=20.0, help="max predicted seconds per case")
+    parser.add_argument("--min-time", type=float, default=0.2, help="min seconds to time each case")
+    parser.add_argument("--max-genome", type=int, default=max(GENOME_LENGTHS))
+    args = parser.parse_args()
+
+    results = run(args)
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = find_regressions(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against baseline")
@@ -0,0 +1,187 @@
+"""
+Headless rendering benchmark for every screen in main.py.
+
+Runs the draw functions under SDL's dummy video driver at several resolutions
+with a fixed seed, and writes per-function timings and Python-heap allocations
+to JSON so runs from before and after a change can be compared.
+
+Usage:
+    python bench_render.py --out before.json
+    python bench_render.py --out after.json --compare before.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import time
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+import main as game
+
+RESOLUTIONS = {
+    "720p": (1280, 720),
+    "1080p": (1920, 1080),
+    "1440p": (2560, 1440),
+    "4k": (3840, 2160),
+}
+
+# Fallback art from the repo, used when the paths configured in main.py are missing
+# so the background/logo scaling cost is still part of the numbers
+ASSET_FALLBACKS = {
+    "background_image": "gamebackground.png",
+    "startscreen_background_image": "tutorial.png",
+    "logo_image": "zymologo2.png",
+}
+
+
+def load_fallback_assets():
+    here = os.path.dirname(os.path.abspath(__file__))
+    used = {}
+    for name, filename in ASSET_FALLBACKS.items():
+        if getattr(game, name) is None:
+            try:
+                setattr(game, name, pygame.image.load(os.path.join(here, filename)))
+                used[name] = filename
+            except (pygame.error, FileNotFoundError):
+                used[name] = None
+        else:
+            used[name] = "configured"
+    return used
+
+
+def set_resolution(width, height):
+    """Apply the same globals main() recomputes on a VIDEORESIZE."""
+    game.WIDTH, game.HEIGHT = width, height
+    game.window = pygame.display.set_mode((width, height))
+    game.SCALE_X = width / 1920
+    game.SCALE_Y = height / 1080
+    game.VERTICAL_PADDING = int(height * 0.05)
+    game.font = pygame.font.SysFont('Arial', int(36 * min(game.SCALE_X, game.SCALE_Y)))
+    game.small_font = pygame.font.SysFont('Arial', int(24 * min(game.SCALE_X, game.SCALE_Y)))
+
+
+def build_cases(seed):
+    """Return (name, callable) pairs that each draw one frame of a screen."""
+    random.seed(seed)
+    genome_seq = game.generate_dna_sequence(250)
+    player_seq = game.generate_player_sequence_from_genome(genome_seq)
+    score = game.calculate_score(player_seq, genome_seq, 0)
+    leaderboard = [{"name": f"Player {i}", "score": 50 - i, "time": 10.0 + i} for i in range(10)]
+    base_font = pygame.font.SysFont('Arial', int(50 * min(game.SCALE_X, game.SCALE_Y)))
+    frame = [0]
+
+    def tick():
+        # Fixed 60 fps clock so animated alphas are the same on every run
+        frame[0] += 1
+        return frame[0] * 16
+
+    return [
+        ("draw_sequences", lambda: game.draw_sequences(
+            player_seq, genome_seq, 0, 10, tick(), display_time=12.3)),
+        ("draw_sequences_hint", lambda: game.draw_sequences(
+            player_seq, genome_seq, 0, 10, tick(), True, 0, display_time=12.3)),
+        ("draw_buttons", lambda: game.draw_buttons(None, score)),
+        ("draw_leaderboard", lambda: game.draw_leaderboard(
+            leaderboard, score, 42.0, "Player 3", "won", None)),
+        ("draw_start_screen", game.draw_start_screen),
+        ("create_glow_surface", lambda: game.create_glow_surface(
+            "A", base_font, game.COLORS["A"], 128 + tick() % 64)),
+    ]
+
+
+def measure(fn, iterations, warmup):
+    for _ in range(warmup):
+        fn()
+
+    times = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+
+    # Second pass under tracemalloc; kept separate so tracing does not skew the timings.
+    # This only sees the Python heap - SDL pixel buffers are allocated outside it.
+    tracemalloc.start()
+    peak_bytes = []
+    retained_bytes = []
+    for _ in range(min(iterations, 20)):
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        fn()
+        current, peak = tracemalloc.get_traced_memory()
+        peak_bytes.append(peak - before)
+        retained_bytes.append(current - before)
+    tracemalloc.stop()
+
+    times.sort()
+    return {
+        "mean_ms": statistics.fmean(times),
+        "p95_ms": times[min(len(times) - 1, int(len(times) * 0.95))],
+        "min_ms": times[0],
+        "peak_alloc_bytes": int(statistics.fmean(peak_bytes)),
+        "retained_bytes": int(statistics.fmean(retained_bytes)),
+    }
+
+
+def compare(results, baseline):
+    print(f"\n{'resolution':<10} {'function':<22} {'before':>10} {'after':>10} {'change':>8}")
+    for res_name, funcs in results["results"].items():
+        for fn_name, stats in funcs.items():
+            old = baseline["results"].get(res_name, {}).get(fn_name)
+            if old is None:
+                continue
+            change = (stats["mean_ms"] - old["mean_ms"]) / old["mean_ms"] if old["mean_ms"] else 0
+            print(f"{res_name:<10} {fn_name:<22} {old['mean_ms']:>8.3f}ms {stats['mean_ms']:>8.3f}ms "
+                  f"{change:>+7.1%}")
+
+
+def run(args):
+    assets = load_fallback_assets()
+    results = {}
+    for res_name in args.resolutions:
+        width, height = RESOLUTIONS[res_name]
+        set_resolution(width, height)
+        results[res_name] = {}
+        for fn_name, fn in build_cases(args.seed):
+            stats = measure(fn, args.iterations, args.warmup)
+            results[res_name][fn_name] = stats
+            print(f"{res_name:<6} {fn_name:<22} mean {stats['mean_ms']:8.3f} ms  "
+                  f"p95 {stats['p95_ms']:8.3f} ms  peak {stats['peak_alloc_bytes']:>9} B")
+    return {
+        "benchmark": "render",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "iterations": args.iterations,
+        "assets": assets,
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark main.py's draw functions headlessly")
+    parser.add_argument("--out", default="render_bench.json")
+    parser.add_argument("--compare", help="previous results JSON to diff against")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--resolutions", nargs="+", choices=list(RESOLUTIONS),
+                        default=list(RESOLUTIONS))
+    args = parser.parse_args()
+
+    results = run(args)
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Wrote {args.out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
@@ -0,0 +1,77 @@
+"""
+Undo/redo for the read's gap edits.
+
+Every edit is recorded as a small tuple instead of a copy of player_seq:
+
+    (op, index, alignment_start, score)
+
+op is INSERT_GAP / DELETE_GAP at read index `index`, or FLIP for a strand flip
+(its own inverse, index unused). alignment_start and score are the state on the
+other side of the edit, so undoing (or redoing) restores the score without
+rescoring the read as long as it has not been moved since; otherwise score is
+None and the caller rescores as usual.
+
+The history belongs to one read in one game; track() clears it when a new
+game starts or another read becomes active.
+"""
+from alignment import reverse_complement
+
+INSERT_GAP = 0
+DELETE_GAP = 1
+FLIP = 2
+
+MAX_EDITS = 1000   # Oldest edits are dropped past this many
+
+
+def apply_edit(player_seq, op, index):
+    if op == INSERT_GAP:
+        return player_seq[:index] + '-' + player_seq[index:]
+    if op == DELETE_GAP:
+        return player_seq[:index] + player_seq[index + 1:]
+    return reverse_complement(player_seq)
+
+
+def inverse(op):
+    if op == INSERT_GAP:
+        return DELETE_GAP
+    if op == DELETE_GAP:
+        return INSERT_GAP
+    return FLIP
+
+
+class EditLog:
+    def __init__(self, max_edits=MAX_EDITS):
+        self.max_edits = max_edits
+        self.undo_stack = []
+        self.redo_stack = []
+        self._owner = (None, None)
+
+    def track(self, game, read_index=0):
+        """Clear the history when `game` (any value identifying the game) or the read changes."""
+        if self._owner != (game, read_index):
+            self._owner = (game, read_index)
+            self.undo_stack.clear()
+            self.redo_stack.clear()
+
+    def record(self, op, index, alignment_start, score):
+        """Log an edit just made; alignment_start and score are from before it."""
+        self.undo_stack.append((op, index, alignment_start, score))
+        if len(self.undo_stack) > self.max_edits:
+            del self.undo_stack[0]
+        self.redo_stack.clear()
+
+    def undo(self, player_seq, alignment_start, score):
+        """Revert the last edit. Returns (player_seq, score) with score None if unknown, or None."""
+        return self._replay(self.undo_stack, self.redo_stack, player_seq, alignment_start, score, True)
+
+    def redo(self, player_seq, alignment_start, score):
+        """Reapply the last undone edit, as undo()."""
+        return self._replay(self.redo_stack, self.undo_stack, player_seq, alignment_start, score, False)
+
+    def _replay(self, source, target, player_seq, alignment_start, score, undoing):
+        if not source:
+            return None
+        op, index, start, saved_score = source.pop()
+        target.append((op, index, alignment_start, score))
+        player_seq = apply_edit(player_seq, inverse(op) if undoing else op, index)
+        return player_seq, saved_score if start == alignment_start else None
@@ -0,0 +1,184 @@
+"""
+Indexed random access to FASTA reference genomes.
+
+The file is memory-mapped and described by a samtools-style .fai index
+(NAME, LENGTH, OFFSET, LINEBASES, LINEWIDTH per record), so any region can be
+pulled out in time proportional to its length without reading the rest of the
+file. The index is read from <file>.fai when present and up to date, otherwise
+it is built with one streaming pass and saved next to the FASTA.
+
+locate_many() finds several k-mers in one pass over the records, fetched
+LOCATE_WINDOW bases at a time (upper-cased, without line breaks), so
+soft-masked references match, hits across line breaks are found and memory
+stays bounded however long a record is.
+"""
+import os
+import random
+
+try:
+    import mmap
+except ImportError:  # The web build has no mmap; fall back to seek/read
+    mmap = None
+
+VALID_BASES = frozenset("ATGC")
+LOCATE_WINDOW = 1 << 22  # Bases fetched at a time while searching for k-mers (~4 MB)
+
+
+class FastaIndexError(Exception):
+    pass
+
+
+class FaiRecord:
+    __slots__ = ("name", "length", "offset", "line_bases", "line_width")
+
+    def __init__(self, name, length, offset, line_bases, line_width):
+        self.name = name
+        self.length = length
+        self.offset = offset
+        self.line_bases = line_bases
+        self.line_width = line_width
+
+    def byte_offset(self, pos):
+        """File offset of base `pos` (0-based) within this record."""
+        return self.offset + (pos // self.line_bases) * self.line_width + pos % self.line_bases
+
+
+def build_fai(path):
+    """Scan a FASTA file once and return its index records."""
+    records = []
+    name = None
+    with open(path, "rb") as f:
+        offset = 0
+        for line in f:
+            line_start = offset
+            offset += len(line)
+            if line.startswith(b">"):
+                if name is not None:
+                    records.append(FaiRecord(name, length, seq_offset, line_bases, line_width))
+                name = line[1:].split()[0].decode()
+                length = 0
+                seq_offset = offset
+                line_bases = line_width = None
+                last_line_short = False
+                continue
+            if name is None:
+                if line.strip():
+                    raise FastaIndexError(f"{path}: sequence data before the first header")
+                continue
+            bases = len(line.rstrip(b"\r\n"))
+            if bases == 0:
+                continue
+            if line_bases is None:
+                line_bases, line_width = bases, len(line)
+            elif last_line_short or bases > line_bases:
+                raise FastaIndexError(f"{path}: record {name} has uneven line lengths "
+                                      f"(byte {line_start}); cannot index it")
+            last_line_short = bases < line_bases
+            length += bases
+    if name is not None:
+        records.append(FaiRecord(name, length, seq_offset, line_bases or 0, line_width or 0))
+    return records
+
+
+def write_fai(records, fai_path):
+    with open(fai_path, "w") as f:
+        for r in records:
+            f.write(f"{r.name}\t{r.length}\t{r.offset}\t{r.line_bases}\t{r.line_width}\n")
+
+
+def read_fai(fai_path):
+    records = []
+    with open(fai_path) as f:
+        for line in f:
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) < 5:
+                continue
+            records.append(FaiRecord(fields[0], *(int(v) for v in fields[1:5])))
+    return records
+
+
+class FastaFile:
+    def __init__(self, path):
+        self.path = path
+        fai_path = path + ".fai"
+        if os.path.exists(fai_path) and os.path.getmtime(fai_path) >= os.path.getmtime(path):
+            records = read_fai(fai_path)
+        else:
+            records = build_fai(path)
+            try:
+                write_fai(records, fai_path)
+            except OSError:
+                pass  # Read-only location; the index just isn't cached
+        self.records = {r.name: r for r in records if r.length > 0}
+        if not self.records:
+            raise FastaIndexError(f"{path}: no sequences found")
+        self._file = open(path, "rb")
+        self._map = None
+        if mmap is not None:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+        self._file.close()
+
+    def fetch(self, name, start, end):
+        """Return bases [start, end) of record `name`, upper-cased, without newlines."""
+        record = self.records[name]
+        start = max(0, start)
+        end = min(record.length, end)
+        if start >= end:
+            return ""
+        first = record.byte_offset(start)
+        last = record.byte_offset(end - 1) + 1
+        if self._map is not None:
+            raw = self._map[first:last]
+        else:
+            self._file.seek(first)
+            raw = self._file.read(last - first)
+        return raw.replace(b"\n", b"").replace(b"\r", b"").decode("ascii").upper()
+
+    def locate_many(self, kmers):
+        """
+        Return {kmer: (record name, position)} for the first occurrence of each
+        kmer in file order, ignoring case. kmers with bases other than A/C/G/T
+        never match; missing kmers are left out.
+        """
+        wanted = {kmer: kmer.upper() for kmer in kmers}
+        wanted = {kmer: upper for kmer, upper in wanted.items() if VALID_BASES.issuperset(upper)}
+        hits = {}
+        if not wanted:
+            return hits
+        overlap = max(map(len, wanted.values())) - 1  # So a hit across two windows is still seen
+        for name, record in self.records.items():
+            for start in range(0, record.length, LOCATE_WINDOW):
+                window = self.fetch(name, start, start + LOCATE_WINDOW + overlap)
+                for kmer, upper in list(wanted.items()):
+                    index = window.find(upper)
+                    if index >= 0:
+                        hits[kmer] = (name, start + index)
+                        del wanted[kmer]
+                if not wanted:
+                    return hits
+        return hits
+
+    def locate(self, kmer):
+        """Return (record name, position) of the first occurrence of kmer, as locate_many(), or None."""
+        return self.locate_many([kmer]).get(kmer)
+
+    def random_window(self, length, rng=random, attempts=50):
+        """
+        Return a random window of `length` bases containing only A/T/G/C,
+        picking records in proportion to their length.
+        """
+        candidates = [r for r in self.records.values() if r.length >= length]
+        if not candidates:
+            raise ValueError(f"no record in {self.path} is at least {length} bases long")
+        weights = [r.length - length + 1 for r in candidates]
+        for _ in range(attempts):
+            record = rng.choices(candidates, weights)[0]
+            start = rng.randrange(record.length - length + 1)
+            window = self.fetch(record.name, start, start + length)
+            if VALID_BASES.issuperset(window):
+                return window
+        raise ValueError(f"could not find a {length}-base window without ambiguous bases in {self.path}")
@@ -0,0 +1,169 @@
+"""
+Streaming FASTQ sampler for puzzles built from real sequencing reads.
+
+Reads are streamed (plain or gzip) and reservoir-sampled, so memory stays
+constant however large the file is. Reads that are too short or too long, have
+a low mean quality or contain ambiguous bases are dropped before sampling. One
+pass over the file samples RESERVOIR_SIZE reads, and refills take pool_size of
+them at a time, so the file is only read again once they have all been used. A
+background thread keeps a pool of ready puzzles so "Play Again" never waits on
+the file. The web build has no threads; there the pool is refilled inline.
+"""
+import gzip
+import random
+import threading
+from collections import deque
+
+from alignment import reverse_complement
+
+VALID_BASES = frozenset("ATGC")
+PHRED_OFFSET = 33
+RESERVOIR_SIZE = 1024  # Reads kept per pass over the file (~100 KiB of sequence)
+
+
+def open_fastq(path):
+    with open(path, "rb") as f:
+        gzipped = f.read(2) == b"\x1f\x8b"
+    if gzipped:
+        return gzip.open(path, "rt", encoding="ascii", errors="replace")
+    return open(path, "r", encoding="ascii", errors="replace")
+
+
+def iter_fastq(handle):
+    """Yield (name, sequence, quality) for each four-line record."""
+    while True:
+        header = handle.readline()
+        if not header:
+            return
+        seq = handle.readline().rstrip()
+        plus = handle.readline()
+        qual = handle.readline().rstrip()
+        if not header.startswith("@") or not plus.startswith("+") or len(seq) != len(qual):
+            raise ValueError(f"malformed FASTQ record near {header.strip()!r}")
+        yield header[1:].split()[0], seq, qual
+
+
+def mean_quality(qual):
+    return sum(qual.encode("ascii")) / len(qual) - PHRED_OFFSET
+
+
+def reservoir_sample(items, k, rng):
+    """Uniformly sample k items from an iterable of unknown length (Algorithm R)."""
+    reservoir = []
+    for n, item in enumerate(items):
+        if n < k:
+            reservoir.append(item)
+        else:
+            j = rng.randrange(n + 1)
+            if j < k:
+                reservoir[j] = item
+    return reservoir
+
+
+def place_read(read, reference, genome_length, rng=random, k=16, seeds=5):
+    """
+    Find where a read came from on the reference and cut a genome window around it.
+    Tries a few exact k-mer seeds on both strands; a minus-strand read is reverse
+    complemented so the puzzle is always on the forward strand.
+    Returns (genome_seq, player_seq) or None if the read could not be placed.
+    """
+    slack = genome_length - len(read) - 8
+    if slack < 0 or len(read) < k:
+        return None
+    step = max(1, (len(read) - k) // max(1, seeds - 1))
+    offsets = range(0, len(read) - k + 1, step)
+    strands = (read, reverse_complement(read))
+    # Every seed of both strands in one pass over the reference
+    hits = reference.locate_many([s[offset:offset + k] for s in strands for offset in offsets])
+    for strand_read in strands:
+        for offset in offsets:
+            hit = hits.get(strand_read[offset:offset + k])
+            if hit is None:
+                continue
+            name, pos = hit
+            record_length = reference.records[name].length
+            window_start = pos - offset - 4 - rng.randrange(slack + 1)
+            window_start = min(max(0, window_start), record_length - genome_length)
+            genome_seq = reference.fetch(name, window_start, window_start + genome_length)
+            if len(genome_seq) == genome_length and VALID_BASES.issuperset(genome_seq):
+                return genome_seq, strand_read
+    return None
+
+
+class FastqSampler:
+    def __init__(self, path, pool_size=16, min_length=50, max_length=120, min_quality=20,
+                 prepare=None, seed=None, reservoir_size=RESERVOIR_SIZE):
+        self.path = path
+        self.pool_size = pool_size
+        self.reservoir_size = max(pool_size, reservoir_size)
+        self.min_length = min_length
+        self.max_length = max_length
+        self.min_quality = min_quality
+        self.prepare = prepare          # read -> puzzle (or None to drop it)
+        self.rng = random.Random(seed)
+        self.pool = deque()
+        self._reads = []                # Sampled reads not handed out yet
+        self._wanted = threading.Event()
+        self._thread = None
+
+    def accept(self, seq, qual):
+        return (self.min_length <= len(seq) <= self.max_length
+                and VALID_BASES.issuperset(seq)
+                and mean_quality(qual) >= self.min_quality)
+
+    def sample_reads(self):
+        """One streaming pass over the file, returning up to reservoir_size reads in random order."""
+        with open_fastq(self.path) as handle:
+            reads = (seq for _, seq, qual in iter_fastq(handle) if self.accept(seq, qual))
+            sample = reservoir_sample(reads, self.reservoir_size, self.rng)
+        self.rng.shuffle(sample)  # The reservoir keeps the first reads in file order
+        return sample
+
+    def take_reads(self):
+        """Up to pool_size sampled reads, making a new pass over the file only when all were used."""
+        if not self._reads:
+            self._reads = self.sample_reads()
+        reads = self._reads[-self.pool_size:]
+        del self._reads[-self.pool_size:]
+        return reads
+
+    def refill(self):
+        for read in self.take_reads():
+            item = self.prepare(read) if self.prepare is not None else read
+            if item is not None:
+                self.pool.append(item)
+
+    def start(self):
+        """Start the background refill thread (or fill inline where threads are unavailable)."""
+        try:
+            self._thread = threading.Thread(target=self._worker, daemon=True)
+            self._thread.start()
+        except RuntimeError:
+            self._thread = None
+        self._wanted.set()
+
+    def _worker(self):
+        while True:
+            self._wanted.wait()
+            self._wanted.clear()
+            while len(self.pool) < self.pool_size:
+                before = len(self.pool)
+                try:
+                    self.refill()
+                except (OSError, ValueError) as e:
+                    print(f"Could not sample reads from {self.path}: {e}")
+                    return
+                if len(self.pool) == before:
+                    break  # Nothing usable in the file
+
+    def next(self):
+        """Return a ready puzzle in O(1), or None if none could be produced."""
+        if not self.pool and self._thread is None:
+            try:
+                self.refill()
+            except (OSError, ValueError) as e:
+                print(f"Could not sample reads from {self.path}: {e}")
+        item = self.pool.popleft() if self.pool else None
+        if len(self.pool) < self.pool_size // 2:
+            self._wanted.set()
+        return item
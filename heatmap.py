@@ -0,0 +1,62 @@
+"""
+Per-base score heatmap drawn as an underline beneath the read.
+
+ScoreHeatmap keeps the column classes from alignment.score_columns() for the
+current read. After an edit (a gap inserted or removed) only the columns from
+the first changed one onwards are rescored; moving the read rescores it all.
+Each board row's underline is rendered once into a strip surface and cached
+until its columns change, so drawing costs one blit per row per frame.
+"""
+import os
+
+import pygame
+
+from alignment import score_columns, mark_free_end_gaps
+from perf_hud import allocations
+
+CLASS_COLORS = (
+    (0, 200, 0),       # Match
+    (220, 20, 60),     # Mismatch
+    (255, 140, 0),     # Gap opening
+    (255, 215, 0),     # Gap extension
+    None,              # Free end gap: no underline
+)
+
+
+class ScoreHeatmap:
+    def __init__(self):
+        self.classes = bytearray()
+        self._player_seq = None
+        self._genome_seq = None
+        self._alignment_start = None
+        self._strips = {}
+
+    def update(self, player_seq, genome_seq, alignment_start):
+        """Bring the column classes up to date; cheap when nothing changed."""
+        if (player_seq == self._player_seq and genome_seq is self._genome_seq
+                and alignment_start == self._alignment_start):
+            return
+        first = 0
+        if genome_seq is self._genome_seq and alignment_start == self._alignment_start:
+            # Only columns from the first changed one onwards need rescoring
+            first = len(os.path.commonprefix((player_seq, self._player_seq)))
+        self.classes[first:] = score_columns(player_seq, genome_seq, alignment_start, first)
+        mark_free_end_gaps(player_seq, self.classes)
+        self._player_seq = player_seq
+        self._genome_seq = genome_seq
+        self._alignment_start = alignment_start
+        self._strips.clear()
+
+    def strip(self, first, last, size):
+        """Underline surface for read columns [first, last) scaled to size, cached."""
+        key = (first, last, size)
+        surface = self._strips.get(key)
+        if surface is None:
+            line = allocations.new_surface((last - first, 1), pygame.SRCALPHA)
+            for x, column in enumerate(self.classes[first:last]):
+                color = CLASS_COLORS[column]
+                if color is not None:
+                    line.set_at((x, 0), color)
+            surface = allocations.scale(line, size)
+            self._strips[key] = surface
+        return surface
@@ -0,0 +1,126 @@
+"""
+Hint search that never blocks a frame.
+
+Puzzles from the pool already carry their solution, but a genome too large to
+solve at generation time is searched when the player asks for a hint. The
+search scores the read at every offset, in chunks. Each chunk is one
+vectorised packed.score_all_offsets() call on a slice of the genome (pure
+calculate_score() without numpy). It runs on the event loop's default
+executor, or, where there are no threads (pygbag), a chunk at a time from the
+game loop. The seed index's candidate diagonals are scored first, so a
+provisional best shows almost at once, and the full scan then refines it. The
+index is built on the worker; the cooperative fallback only uses one that is
+already built, since building it would take a whole frame. The game reads
+best_position every frame and cancels the search when the player edits the
+read or starts a new puzzle.
+"""
+import time
+
+import packed
+from alignment import calculate_score
+from seed_index import index_for, cached_index, DIAGONAL_BAND, MAX_CANDIDATES
+
+CHUNK_OFFSETS = 50_000  # Offsets scored per chunk (~4 ms vectorised) between cancellation checks
+CHUNK_BASES = 20_000    # Bases compared per chunk without numpy
+STEP_BUDGET_MS = 4      # Time per frame for the cooperative fallback
+
+
+class HintSearch:
+    def __init__(self, player_seq, genome_seq):
+        self.player_seq = player_seq
+        self.genome_seq = genome_seq
+        self.best_position = None
+        self.best_score = float('-inf')
+        self.cancelled = False
+        self.done = False
+        self.last_position = len(genome_seq) - (len(player_seq) + 4)
+        self._future = None
+        self._scanned = 0
+        self._chunks = None
+
+    @property
+    def progress(self):
+        """Fraction of the offsets scored so far."""
+        return 1.0 if self.done else self._scanned / max(1, self.last_position + 1)
+
+    def start(self, loop):
+        """Run on the loop's default executor, falling back to step() without threads."""
+        self._chunks = self._iter_chunks(on_worker=True)
+        try:
+            self._future = loop.run_in_executor(None, self._run)
+        except RuntimeError:
+            self._future = None
+            self._chunks = None
+        else:
+            self._future.add_done_callback(self._finished)
+
+    def cancel(self):
+        self.cancelled = True
+
+    def step(self, budget_ms=STEP_BUDGET_MS):
+        """Cooperative fallback: score chunks until budget_ms is used up. No-op on a worker."""
+        if self._future is not None or self.done or self.cancelled:
+            return
+        if self._chunks is None:
+            self._chunks = self._iter_chunks(on_worker=False)
+        deadline = time.perf_counter() + budget_ms / 1000
+        while time.perf_counter() < deadline:
+            if next(self._chunks, False) is False:
+                self.done = True
+                return
+
+    def _run(self):
+        for _ in self._chunks:
+            if self.cancelled:
+                return
+        self.done = True
+
+    def _finished(self, future):
+        # A failed search would otherwise be dropped silently and never finish
+        if future.cancelled() or future.exception() is None:
+            return
+        print(f"Hint search failed: {future.exception()!r}")
+        self.done = True
+
+    def _keep(self, pos, score):
+        # Ties go to the leftmost offset, as in the exhaustive search
+        if score > self.best_score or (score == self.best_score and pos < self.best_position):
+            self.best_score = score
+            self.best_position = pos
+
+    def _score(self, positions):
+        for pos in positions:
+            self._keep(pos, calculate_score(self.player_seq, self.genome_seq, pos))
+
+    def _score_range(self, start, end):
+        """Score the offsets start..end - 1 in one vectorised call."""
+        if packed.np is None:
+            self._score(range(start, end))
+            return
+        window = self.genome_seq[start:end + len(self.player_seq) - 1]
+        scores = packed.score_all_offsets(self.player_seq, window)
+        best = int(packed.np.argmax(scores))
+        self._keep(start + best, scores[best].item())
+
+    def _iter_chunks(self, on_worker):
+        if self.last_position < 0:
+            return
+        # Seeded candidates first for a quick provisional answer
+        index = index_for(self.genome_seq) if on_worker else cached_index(self.genome_seq)
+        if index is not None:
+            # A few hundred offsets: cheaper one at a time than one array call per band
+            candidates = set()
+            for diagonal, _ in index.diagonals(self.player_seq)[:MAX_CANDIDATES]:
+                candidates.update(range(max(0, diagonal - DIAGONAL_BAND),
+                                        min(self.last_position, diagonal + DIAGONAL_BAND) + 1))
+            self._score(sorted(candidates))
+            yield True
+        if packed.np is None:
+            chunk = max(1, CHUNK_BASES // max(1, len(self.player_seq)))
+        else:
+            chunk = CHUNK_OFFSETS
+        for start in range(0, self.last_position + 1, chunk):
+            end = min(self.last_position + 1, start + chunk)
+            self._score_range(start, end)
+            self._scanned = end
+            yield True
@@ -1,9 +1,31 @@
 import pygame
 import random
 import asyncio
-from moviepy.video.io.VideoFileClip import VideoFileClip
 import pygame.joystick
 import math
+import json
+from alignment import (
+    generate_dna_sequence, generate_player_sequence_from_genome,
+    calculate_score, set_scoring_model,
+    AMINO_ACIDS, generate_protein_sequence, reverse_complement,
+)
+from scoring import load_model
+from perf_hud import PerfHUD, allocations
+from tracing import tracer, traced
+from memory_monitor import MemoryMonitor
+from viewport import GenomeViewport
+from minimap import GenomeMinimap
+from fasta import FastaFile, FastaIndexError
+from fastq import FastqSampler, place_read
+from puzzle_pool import PuzzlePool, daily_seed
+from hint import HintSearch
+from heatmap import ScoreHeatmap
+from multiread import ReadSet
+from edit_log import EditLog, INSERT_GAP, DELETE_GAP, FLIP
+from replay import ReplayRecorder, Ghost
+
+# Trace the engine calls made from the game loop
+calculate_score = traced(calculate_score)
 
 
 # Initialize pygame
@@ -12,7 +34,6 @@ pygame.joystick.init()
 joysticks = [pygame.joystick.Joystick(i) for i in range(pygame.joystick.get_count())]
 for joystick in joysticks:
     joystick.init()
-random.seed()
 
 
 # Add these after your pygame initialization code
@@ -23,22 +44,73 @@ logo_path = "C:\\Users\\kmccl\\Documents\\GitHub\\seq_align_game-main\\zymologo2
 # Load both images
 try:
     background_image = pygame.image.load(background_path)
-except pygame.error as e:
+except (pygame.error, FileNotFoundError) as e:
     print(f"Could not load background image: {e}")
     background_image = None
 
 try:
     logo_image = pygame.image.load(logo_path)
-except pygame.error as e:
+except (pygame.error, FileNotFoundError) as e:
     print(f"Could not load logo image: {e}")
     logo_image = None
 
 try:
     startscreen_background_image = pygame.image.load(startscreen_background_path)
-except pygame.error as e:
+except (pygame.error, FileNotFoundError) as e:
     print(f"Could not load start screen background image: {e}")
     startscreen_background_image = None
 
+# "dna" or "protein". Protein mode plays peptide puzzles over the 20 amino acids,
+# scored with BLOSUM62.
+sequence_mode = "dna"
+# DNA only: reads may come from either strand. About half the puzzles show the
+# read reverse-complemented, and R flips it back.
+both_strands = False
+
+# Multi-read mode: reads_per_puzzle > 1 places that many reads on the same
+# genome, each with its own offset and gaps; Tab (or the right bumper) switches
+# between them and the score is their sum.
+reads_per_puzzle = 1
+
+# Scoring model: a preset name ("simple", "transitions", "iupac", "semiglobal",
+# "blosum62") or a JSON file, see scoring.py. Used by the score, the hint and the validator.
+scoring_model_name = "blosum62" if sequence_mode == "protein" else "simple"
+try:
+    set_scoring_model(load_model(scoring_model_name))
+except (OSError, ValueError) as e:
+    print(f"Could not load scoring model {scoring_model_name}: {e}")
+
+# Every puzzle is built from a seed, shown on the results screen. Set
+# daily_challenge to have every kiosk play the day's seed (e.g. 20261019), or
+# puzzle_seed to replay one particular puzzle.
+daily_challenge = False
+puzzle_seed = None
+
+# Optional real reference genome (e.g. a Zymo reference FASTA). When it loads,
+# every puzzle is cut from a random window of it instead of random bases.
+reference_fasta_path = None
+
+reference_genome = None
+if reference_fasta_path is not None:
+    try:
+        reference_genome = FastaFile(reference_fasta_path)
+    except (OSError, FastaIndexError) as e:
+        print(f"Could not load reference genome: {e}")
+
+# Optional sequencing reads (FASTQ, may be gzipped) from the same organism as the
+# reference. Each puzzle is then a real read placed back on its genome window.
+reads_fastq_path = None
+
+# Sampled reads depend on the sampler's pool rather than the seed, so they are
+# not used when every kiosk has to play the same puzzle.
+read_sampler = None
+if (reference_genome is not None and reads_fastq_path is not None and sequence_mode == "dna"
+        and not daily_challenge and puzzle_seed is None):
+    read_sampler = FastqSampler(
+        reads_fastq_path,
+        prepare=lambda read: place_read(read, reference_genome, GENOME_LENGTH),
+    )
+
 # Add banner height constant after the other display constants
 BANNER_HEIGHT = 80  # Height of the banner in pixels
 # Get the display info to set up dynamic window sizing
@@ -81,8 +153,8 @@ instructions_button_rect = pygame.Rect(750 * SCALE_X, HEIGHT - 100 * SCALE_Y, 18
 # Update font sizes with better scaling
 font_size = int(36 * min(SCALE_X, SCALE_Y))  # Reduced from 48
 small_font_size = int(24 * min(SCALE_X, SCALE_Y))  # Reduced from 32
-font = pygame.font.SysFont('Arial', font_size)
-small_font = pygame.font.SysFont('Arial', small_font_size)
+font = allocations.sys_font('Arial', font_size)
+small_font = allocations.sys_font('Arial', small_font_size)
 
 # Colors
 WHITE = (255, 255, 255)
@@ -106,27 +178,44 @@ COLORS = {
     '-': (128, 128, 128)  # Gray for gaps
 }
 
+# Colors for amino acids, grouped by side chain
+PROTEIN_COLORS = {
+    **{aa: (25, 25, 112) for aa in "AVLIM"},   # Hydrophobic: midnight blue
+    **{aa: (0, 128, 128) for aa in "FWY"},     # Aromatic: teal
+    **{aa: (220, 20, 60) for aa in "KRH"},     # Positive: crimson red
+    **{aa: (139, 0, 139) for aa in "DE"},      # Negative: dark magenta
+    **{aa: (46, 139, 87) for aa in "STNQ"},    # Polar: sea green
+    'C': (218, 165, 32),                        # Cysteine: golden rod
+    'G': (255, 140, 0),                         # Glycine: dark orange
+    'P': (184, 134, 11),                        # Proline: dark golden rod
+    '-': (128, 128, 128)                        # Gray for gaps
+}
+if sequence_mode == "protein":
+    COLORS = PROTEIN_COLORS
 
 
-# Scoring values
-MATCH = 1
-MISMATCH = -1
-GAP_OPENING = -2
-GAP_EXTENSION = -1
 
 # Display dimensions for genome sequence
+GENOME_LENGTH = 250  # Bases per puzzle; the board scrolls once this needs more than NUM_GENOME_ROWS rows
 GENOME_ROW_LENGTH = 42
-NUM_GENOME_ROWS = 6
+NUM_GENOME_ROWS = 6 if reads_per_puzzle == 1 else 4  # Fewer, taller rows to stack the extra reads
 ROW_SPACING = int(200 * SCALE_Y)
 
 BUTTON_A = 0  # Typically the A button is index 0
 BUTTON_B = 1  # Typically the B button is index 1
 BUTTON_Y = 3 
 BUTTON_X = 2
+BUTTON_LB = 4     # Left bumper: undo the last gap edit (Back + left bumper: redo)
+BUTTON_RB = 5     # Right bumper: next read in multi-read mode
+BUTTON_BACK = 6   # Back + Start together toggle the performance overlay
+BUTTON_START = 7
 
-# Video file path
-video_path = "C:\\Users\\kmccl\\Documents\\GitHub\\seq_align_game-main\\zymologo.mov"
+# Intro animation, pre-rendered from zymologo.mov by make_intro_sheet.py so the
+# web build does not need moviepy/ffmpeg
+intro_sheet_path = "zymologo_intro.png"
+intro_meta_path = "zymologo_intro.json"
 
+@traced
 def draw_banner():
     # Draw black banner
     banner_rect = pygame.Rect(0, 0, WIDTH, BANNER_HEIGHT)
@@ -142,17 +231,17 @@ def draw_banner():
         try:
             # Convert image to RGB mode if it's not already
             if logo_image.get_bitsize() != 32:
-                temp_surface = pygame.Surface((logo_image.get_width(), logo_image.get_height()), pygame.SRCALPHA)
+                temp_surface = allocations.new_surface((logo_image.get_width(), logo_image.get_height()), pygame.SRCALPHA)
                 temp_surface.blit(logo_image, (0, 0))
                 logo_image_rgb = temp_surface
             else:
                 logo_image_rgb = logo_image
                 
             # Use smoothscale for better quality scaling
-            scaled_logo = pygame.transform.smoothscale(logo_image_rgb, (logo_width, logo_height))
+            scaled_logo = allocations.smoothscale(logo_image_rgb, (logo_width, logo_height))
         except:
             # Fallback to regular scale if smoothscale fails
-            scaled_logo = pygame.transform.scale(logo_image, (logo_width, logo_height))
+            scaled_logo = allocations.scale(logo_image, (logo_width, logo_height))
         
         # Position logo on far right with 5px padding
         logo_x = WIDTH - logo_width - 5
@@ -161,11 +250,22 @@ def draw_banner():
         # Draw logo
         window.blit(scaled_logo, (logo_x, logo_y))
 
+def get_minimap_rect():
+    # Strip in the banner between the timer on the left and the logo on the right
+    logo_width = 0
+    if logo_image is not None:
+        logo_width = int((BANNER_HEIGHT - 4) * logo_image.get_width() / logo_image.get_height())
+    left = int(250 * SCALE_X)
+    right = WIDTH - logo_width - 30
+    height = max(8, int(24 * SCALE_Y))
+    return pygame.Rect(left, (BANNER_HEIGHT - height) // 2, max(0, right - left), height)
+
 # Add this function after your other function definitions
+@traced
 def draw_background():
     if background_image is not None:
         # Scale the background image to match the window size
-        scaled_background = pygame.transform.scale(background_image, (WIDTH, HEIGHT))
+        scaled_background = allocations.scale(background_image, (WIDTH, HEIGHT))
         window.blit(scaled_background, (0, 0))
     else:
         # Fallback to white background if image couldn't be loaded
@@ -189,57 +289,55 @@ def get_score_color(score):
     else:
         return (0, 255, 0)  # Pure green for scores above 10
 
-# Update video handling in play_video function
-def play_video(video_path):
-    clip = VideoFileClip(video_path)
-    # Calculate video dimensions maintaining aspect ratio
-    video_ratio = clip.w / clip.h
-    if video_ratio > target_ratio:
-        video_width = WIDTH
-        video_height = int(WIDTH / video_ratio)
-    else:
-        video_height = HEIGHT
-        video_width = int(HEIGHT * video_ratio)
-    
-    # Center the video
-    x_offset = (WIDTH - video_width) // 2
-    y_offset = (HEIGHT - video_height) // 2
-    
-    clip = clip.resize((video_width, video_height))
-    clip.preview()
-
+def load_intro_animation():
+    """
+    Load the intro sprite sheet and its frame table.
+    Returns (sheet, meta) where meta["frames"] lists the patches to blit onto the canvas,
+    or None if the files are missing.
+    """
+    try:
+        sheet = pygame.image.load(intro_sheet_path).convert()
+        with open(intro_meta_path) as f:
+            meta = json.load(f)
+    except (pygame.error, OSError, ValueError) as e:
+        print(f"Could not load intro animation: {e}")
+        return None
+    return sheet, meta
+
+@traced
 def create_blinking_text_surface(text, font_size, color, current_time):
     """
     Creates a text surface that changes alpha based on time.
     Returns a surface with the text at the current alpha value.
     """
     # Create font for the blinking text
-    blink_font = pygame.font.SysFont('Arial', font_size)
+    blink_font = allocations.sys_font('Arial', font_size)
     
     # Calculate alpha value using sine wave for smooth blinking
     # Complete cycle every 1000ms (1 second)
     alpha = abs(math.sin(current_time * 0.003)) * 255
     
     # Create the text surface
-    text_surface = blink_font.render(text, True, color)
+    text_surface = allocations.render(blink_font, text, color)
     
     # Create a surface with alpha channel
-    alpha_surface = pygame.Surface(text_surface.get_size(), pygame.SRCALPHA)
+    alpha_surface = allocations.new_surface(text_surface.get_size(), pygame.SRCALPHA)
     
     # Set the alpha value for the entire surface
     alpha_surface.fill((color[0], color[1], color[2], alpha))
     
     # Blit the text onto a new surface with alpha
-    final_surface = pygame.Surface(text_surface.get_size(), pygame.SRCALPHA)
+    final_surface = allocations.new_surface(text_surface.get_size(), pygame.SRCALPHA)
     final_surface.blit(text_surface, (0, 0))
     final_surface.blit(alpha_surface, (0, 0), special_flags=pygame.BLEND_RGBA_MULT)
     
     return final_surface
 
+@traced
 def draw_start_screen():
     if startscreen_background_image is not None:
         # Scale the background image to match the window size
-        scaled_background = pygame.transform.scale(startscreen_background_image, (WIDTH, HEIGHT))
+        scaled_background = allocations.scale(startscreen_background_image, (WIDTH, HEIGHT))
         window.blit(scaled_background, (0, 0))
     
     # Draw black banner at the top
@@ -271,16 +369,16 @@ def draw_start_screen():
         try:
             # Convert image to RGB mode if needed
             if logo_image.get_bitsize() != 32:
-                temp_surface = pygame.Surface((logo_image.get_width(), logo_image.get_height()), pygame.SRCALPHA)
+                temp_surface = allocations.new_surface((logo_image.get_width(), logo_image.get_height()), pygame.SRCALPHA)
                 temp_surface.blit(logo_image, (0, 0))
                 logo_image_rgb = temp_surface
             else:
                 logo_image_rgb = logo_image
             
             # Scale the logo
-            scaled_logo = pygame.transform.smoothscale(logo_image_rgb, (logo_width, logo_height))
+            scaled_logo = allocations.smoothscale(logo_image_rgb, (logo_width, logo_height))
         except:
-            scaled_logo = pygame.transform.scale(logo_image, (logo_width, logo_height))
+            scaled_logo = allocations.scale(logo_image, (logo_width, logo_height))
         
         # Position logo on far right with padding
         logo_x = WIDTH - logo_width - 5
@@ -290,94 +388,86 @@ def draw_start_screen():
         window.blit(scaled_logo, (logo_x, logo_y))
     
     pygame.display.update()
+def new_genome_sequence(rng=random):
+    # Window of the reference genome when one is configured, otherwise random bases
+    if sequence_mode == "protein":
+        return generate_protein_sequence(GENOME_LENGTH, seed=rng.getrandbits(64))
+    if reference_genome is not None:
+        try:
+            return reference_genome.random_window(GENOME_LENGTH, rng)
+        except ValueError as e:
+            print(f"Falling back to a random genome: {e}")
+    return generate_dna_sequence(GENOME_LENGTH, seed=rng.getrandbits(64))
+
+def generate_puzzle(seed):
+    # A sampled read on its genome window when reads are configured, otherwise
+    # one generated from the seed (the same puzzle as validator.generate_seeded_puzzle).
+    # Returns (genome_seq, player_seq, seed), with seed None when the seed cannot
+    # rebuild the puzzle: with a sampler, even the fallback depends on its pool.
+    rng = random.Random(seed)
+    if read_sampler is not None:
+        seed = None
+        puzzle = read_sampler.next()
+        if puzzle is not None:
+            genome_seq, player_seq = puzzle
+            if both_strands and rng.random() < 0.5:
+                player_seq = reverse_complement(player_seq)
+            return genome_seq, player_seq, seed
+    genome_seq = new_genome_sequence(rng)
+    alphabet = AMINO_ACIDS if sequence_mode == "protein" else 'ATGC'
+    player_seq = generate_player_sequence_from_genome(genome_seq, alphabet, rng)
+    if both_strands and sequence_mode == "dna" and rng.random() < 0.5:
+        player_seq = reverse_complement(player_seq)  # A read from the minus strand
+    return genome_seq, player_seq, seed
+
+def generate_extra_read(genome_seq, rng=random):
+    # Another read from the same genome for multi-read puzzles
+    alphabet = AMINO_ACIDS if sequence_mode == "protein" else 'ATGC'
+    player_seq = generate_player_sequence_from_genome(genome_seq, alphabet, rng)
+    if both_strands and sequence_mode == "dna" and rng.random() < 0.5:
+        player_seq = reverse_complement(player_seq)
+    return player_seq
+
+def leader_ghost(leaderboard, puzzle):
+    # The best recorded game on this puzzle's seed, if there is one (the leaderboard is sorted)
+    if puzzle.seed is None:
+        return None
+    for row in leaderboard:
+        if row.get("seed") == puzzle.seed and row.get("replay"):
+            return Ghost(row["replay"], puzzle.genome_seq, puzzle.player_seq, row["name"])
+    return None
+
+def next_puzzle(puzzle_pool):
+    # The day's (or the configured) seed when set, otherwise the next pooled puzzle
+    seed = daily_seed() if daily_challenge else puzzle_seed
+    if seed is not None:
+        return puzzle_pool.get(seed)  # Cached after the first game
+    return puzzle_pool.next()
+
+def current_score(read_set, player_seq, genome_seq, alignment_start):
+    # The read's score, or the sum over all reads in multi-read mode
+    if read_set is None:
+        return calculate_score(player_seq, genome_seq, alignment_start)
+    read_set.store(player_seq, alignment_start)
+    return read_set.total_score()
+
 def draw_text(text, font, color, surface, x, y):
-    textobj = font.render(text, True, color)
+    textobj = allocations.render(font, text, color)
     textrect = textobj.get_rect()
     textrect.topleft = (x, y)
     surface.blit(textobj, textrect)
 
-def generate_dna_sequence(length):
-    # Generate a random sequence of specified length
-    return ''.join(random.choice('ATGC') for _ in range(length))
-
-def generate_player_sequence_from_genome(genome_seq):
-    """
-    Generate a player sequence that requires ONLY gap insertions (no deletions) to achieve maximum score.
-    The sequence will be derived from the genome sequence with:
-    - Gaps that need to be inserted by the player (sequence is shorter than matching genome region)
-    - Some point mutations
-    - NO need for deletions
-    
-    Maximum score is fixed at 50 points:
-    - Each match = +1 point
-    - Each mismatch = -1 point
-    - Gap opening = -2 points
-    - Gap extension = -1 point
-    """
-    # Find all possible 54-base windows in the genome (we'll create a 50-base player sequence from this)
-    window_size = 54  # Larger window to accommodate the gaps we'll need
-    possible_windows = []
-    
-    for i in range(len(genome_seq) - window_size + 1):
-        window = genome_seq[i:i + window_size]
-        possible_windows.append((i, window))
-    
-    # Select a random window
-    start_idx, genome_window = random.choice(possible_windows)
-    
-    # Create player sequence by removing 4 bases (creating gaps that need to be filled)
-    # First, convert genome window to list and make a copy for the player sequence
-    genome_bases = list(genome_window)
-    player_seq = list(genome_window)
-    
-    # Select 4 positions to remove (these will need gaps added by player)
-    gap_positions = random.sample(range(len(genome_bases)), 4)
-    gap_positions.sort(reverse=True)  # Remove from end to avoid index issues
-    
-    # Remove these positions from player sequence
-    for pos in gap_positions:
-        player_seq.pop(pos)
-    
-    # Add 2 point mutations
-    # Make sure we don't mutate positions next to our gap positions
-    gap_adjacent = set()
-    for pos in gap_positions:
-        gap_adjacent.add(pos - 1)
-        gap_adjacent.add(pos)
-        gap_adjacent.add(pos + 1)
-    
-    available_positions = [i for i in range(len(player_seq)) if i not in gap_adjacent]
-    mutation_positions = random.sample(available_positions, 2)
-    
-    for pos in mutation_positions:
-        original_base = player_seq[pos]
-        possible_bases = [b for b in 'ATGC' if b != original_base]
-        player_seq[pos] = random.choice(possible_bases)
-    
-    # Now the setup for scoring 50 points:
-    # - Player sequence is 50 bases (54 - 4 removals)
-    # - Need to add 4 gaps to match genome sequence
-    # - Score breakdown:
-    #   * 48 matches (+48 points)
-    #   * 2 mismatches (-2 points)
-    #   * 4 gap openings (-8 points)
-    #   * 4 gap extensions (-4 points)
-    #   * Total = 48 - 2 - 8 - 4 = 34 points
-    # - Add 16 more bases that match perfectly to reach 50
-    extra_genome = genome_seq[start_idx + window_size:start_idx + window_size + 16]
-    player_seq.extend(list(extra_genome))
-    
-    return ''.join(player_seq)
+@traced
 def create_glow_surface(text, font, color, alpha):
     # Create text surface with the base color
-    text_surface = font.render(text, True, color)
+    text_surface = allocations.render(font, text, color)
     
     # Create a surface for the glow effect with alpha channel
-    glow_surface = pygame.Surface(text_surface.get_size(), pygame.SRCALPHA)
+    glow_surface = allocations.new_surface(text_surface.get_size(), pygame.SRCALPHA)
     
     # Create a larger surface for the blur effect
     blur_size = 2
-    blur_surface = pygame.Surface((text_surface.get_width() + blur_size * 1.5, 
+    blur_surface = allocations.new_surface((text_surface.get_width() + blur_size * 1.5, 
                                  text_surface.get_height() + blur_size * 2), 
                                 pygame.SRCALPHA)
     
@@ -397,19 +487,60 @@ def create_glow_surface(text, font, color, alpha):
     
     return glow_surface
 
-def draw_sequences(player_seq, genome_seq, alignment_start, selected_position, current_time, showing_hint=False, optimal_position=None, display_time=0):
+# Fonts and rendered glyphs shared by every row of every read. The glow alpha
+# is quantised so the pulse cycles through a few dozen cached sprites instead
+# of re-blurring each base every frame.
+GLOW_ALPHA_STEP = 8
+GHOST_ALPHA = 80  # The leader's ghost is drawn with faded copies of the same glyphs
+fonts = {}
+glyph_cache = {}
+
+def get_font(size):
+    font = fonts.get(size)
+    if font is None:
+        font = fonts[size] = allocations.sys_font('Arial', size)
+    return font
+
+def cached_glyph(text, font, color, alpha=None):
+    # Plain text when alpha is None, otherwise the glow sprite
+    if alpha is not None:
+        alpha -= alpha % GLOW_ALPHA_STEP
+    key = (text, font, color, alpha)
+    surface = glyph_cache.get(key)
+    if surface is None:
+        if alpha is None:
+            surface = allocations.render(font, text, color)
+        else:
+            surface = create_glow_surface(text, font, color, alpha)
+        glyph_cache[key] = surface
+    return surface
+
+def ghost_glyph(text, font, color):
+    key = (text, font, color, "ghost")
+    surface = glyph_cache.get(key)
+    if surface is None:
+        surface = allocations.copy(cached_glyph(text, font, color))
+        surface.set_alpha(GHOST_ALPHA)
+        glyph_cache[key] = surface
+    return surface
+
+@traced
+def draw_sequences(player_seq, genome_seq, alignment_start, selected_position, current_time, showing_hint=False, optimal_position=None, display_time=0, view_row=0.0, heatmap=None, other_reads=(), read_label="Read:", ghost=None, hint_flip=False):
     # Draw background instead of filling with white
     draw_background()
     draw_banner()
 
     # ADD THIS CODE TO DRAW THE TIMER IN THE BANNER
     elapsed_time_text = f"Time: {display_time:.2f} sec"
-    time_surface = small_font.render(elapsed_time_text, True, WHITE)
+    time_surface = allocations.render(small_font, elapsed_time_text, WHITE)
     # Position the time text in the top-left area of the banner, with some padding
     window.blit(time_surface, (10, (BANNER_HEIGHT - time_surface.get_height()) // 2))
+    if ghost is not None:
+        ghost_surface = allocations.render(small_font, f"Ghost {ghost.name}: {ghost.score}", WHITE)
+        window.blit(ghost_surface, (10, (BANNER_HEIGHT + time_surface.get_height()) // 2 + 4))
 
     base_font_size = int(50 * min(SCALE_X, SCALE_Y))  # Make this larger for bigger letters
-    base_font = pygame.font.SysFont('Arial', base_font_size)
+    base_font = get_font(base_font_size)
 
     # ... rest of your draw_sequences code remains unchanged ...
 
@@ -429,17 +560,33 @@ def draw_sequences(player_seq, genome_seq, alignment_start, selected_position, c
 
     # Calculate glow alpha using sine wave for animation
     glow_alpha = int(128 + 64 * math.sin(current_time * 0.004))  # Adjust speed with multiplier
+
+    # Only the rows inside the viewport are drawn. view_row is the (fractional)
+    # top row, so one extra row is drawn while scrolling and the board is
+    # clipped to the area between the banner and the footer.
+    first_row = int(view_row)
+    scroll_offset = (view_row - first_row) * row_spacing
+    total_rows = (len(genome_seq) + GENOME_ROW_LENGTH - 1) // GENOME_ROW_LENGTH
+    visible_rows = range(first_row, min(total_rows, first_row + NUM_GENOME_ROWS + (1 if scroll_offset else 0)))
+    window.set_clip(pygame.Rect(0, BANNER_HEIGHT, WIDTH, HEIGHT - BANNER_HEIGHT - 100 * SCALE_Y))
+
+    # Length of the player sequence without gaps, for the hint highlight
+    player_len = len(player_seq) - player_seq.count('-') + 4
     
     # Draw genome sequence
-    for row in range(NUM_GENOME_ROWS):
+    for row in visible_rows:
         start_idx = row * GENOME_ROW_LENGTH
         end_idx = start_idx + GENOME_ROW_LENGTH
         genome_subseq = genome_seq[start_idx:end_idx]
         
         # Draw row label
         label_x = x_start - 140 * SCALE_X
-        row_y = y_start + row * row_spacing + 10
-        draw_text(f"Genome:", small_font, BLACK, window, label_x, row_y + 10)
+        row_y = y_start + (row - first_row) * row_spacing - scroll_offset + 10
+        hinted_row = (showing_hint and optimal_position is not None
+                      and optimal_position < end_idx + 4 and start_idx + 4 < optimal_position + player_len)
+        # The optimum is on the other strand: say so next to the highlight
+        label = "Flip (R):" if hint_flip and hinted_row else "Genome:"
+        draw_text(label, small_font, BLACK, window, label_x, row_y + 10)
         
         # Draw sequence
         for i, base in enumerate(genome_subseq):
@@ -448,13 +595,11 @@ def draw_sequences(player_seq, genome_seq, alignment_start, selected_position, c
             
             if showing_hint and optimal_position is not None:
                 absolute_pos = start_idx + i + 4
-                # Add length of player sequence without gaps to get correct end position
-                player_len = len([c for c in player_seq if c != '-']) + 4
                 if optimal_position <= absolute_pos < optimal_position + player_len:
-                    # Draw a yellow highlight rectangle behind the base
+                    # Draw a highlight rectangle behind the base, blue if the read must be flipped first
                     highlight_rect = pygame.Rect(x_pos - 2, row_y - 2,
                                             char_width + 4, char_height + 4)
-                    pygame.draw.rect(window, YELLOW, highlight_rect)
+                    pygame.draw.rect(window, MAYABLUE if hint_flip else YELLOW, highlight_rect)
             
             draw_text(base, base_font, color, window, x_pos, row_y)
             
@@ -465,54 +610,75 @@ def draw_sequences(player_seq, genome_seq, alignment_start, selected_position, c
                                (x_pos - 2, row_y + 43, 
                                 char_width, char_height * 0.7), 1)
     
-    # Draw player sequence with glow effect
     player_seq_y_offset = 40 * SCALE_Y
+
+    # The leader's ghost, faint and behind the player's read
+    if ghost is not None:
+        ghost_end = ghost.alignment_start + len(ghost.player_seq)
+        for row in visible_rows:
+            row_start_idx = row * GENOME_ROW_LENGTH
+            row_y = y_start + (row - first_row) * row_spacing - scroll_offset
+            for pos in range(max(row_start_idx, ghost.alignment_start), min(row_start_idx + GENOME_ROW_LENGTH, ghost_end)):
+                base = ghost.player_seq[pos - ghost.alignment_start]
+                window.blit(ghost_glyph(base, base_font, COLORS[base]),
+                            (x_start + (pos - row_start_idx) * char_width, row_y + player_seq_y_offset + 10))
+
+    # Draw player sequence with glow effect
+    read_end = alignment_start + len(player_seq)
     
-    for row in range(NUM_GENOME_ROWS):
+    for row in visible_rows:
         row_start_idx = row * GENOME_ROW_LENGTH
         row_end_idx = row_start_idx + GENOME_ROW_LENGTH
-        row_y = y_start + row * row_spacing
-        
-        if row_start_idx <= alignment_start < row_end_idx:
-            # Draw row label
-            label_x = x_start - 140 * SCALE_X
-            glow_label = create_glow_surface("Read:", small_font, WHITE, glow_alpha)
-            window.blit(glow_label, (label_x, row_y + player_seq_y_offset +25))
-            
-            # First row of player sequence
-            bases_in_row = min(row_end_idx - alignment_start, len(player_seq))
-            player_subseq = player_seq[:bases_in_row]
-            offset = alignment_start - row_start_idx
-            
-            for i, base in enumerate(player_subseq):
-                color = COLORS[base]
-                x_pos = x_start + (offset + i) * char_width
-                
-                # Create and draw the glowing text
-                glow_surface = create_glow_surface(base, base_font, color, glow_alpha)  # Use base_font here
-                window.blit(glow_surface, (x_pos, row_y + player_seq_y_offset + 10))
-        
-        elif alignment_start <= row_start_idx < alignment_start + len(player_seq):
-            # Draw row label
-            label_x = x_start - 140 * SCALE_X
-            glow_label = create_glow_surface("Read:", small_font, WHITE, glow_alpha)
-            window.blit(glow_label, (label_x, row_y + player_seq_y_offset +25))
-            
-            # Middle or last row of player sequence
-            seq_offset = row_start_idx - alignment_start
-            bases_in_row = min(GENOME_ROW_LENGTH, len(player_seq) - seq_offset)
-            player_subseq = player_seq[seq_offset:seq_offset + bases_in_row]
-            
-            for i, base in enumerate(player_subseq):
-                color = COLORS[base]
-                x_pos = x_start + i * char_width
-                
-                # Create and draw the glowing text
-                glow_surface = create_glow_surface(base, base_font, color, glow_alpha)  # Use base_font here
-                window.blit(glow_surface, (x_pos, row_y + player_seq_y_offset + 10))
+        row_y = y_start + (row - first_row) * row_spacing - scroll_offset
 
+        # Part of the read that falls on this row, in genome coordinates
+        first_pos = max(row_start_idx, alignment_start)
+        last_pos = min(row_end_idx, read_end)
+        if first_pos >= last_pos:
+            continue
 
-def draw_buttons(clicked_button, score):
+        # Draw row label
+        label_x = x_start - 140 * SCALE_X
+        glow_label = cached_glyph(read_label, small_font, WHITE, glow_alpha)
+        window.blit(glow_label, (label_x, row_y + player_seq_y_offset +25))
+
+        if heatmap is not None:
+            # Per-base score underline: one cached strip per row
+            underline = heatmap.strip(first_pos - alignment_start, last_pos - alignment_start,
+                                      (int((last_pos - first_pos) * char_width), max(2, int(5 * SCALE_Y))))
+            window.blit(underline, (x_start + (first_pos - row_start_idx) * char_width,
+                                    row_y + player_seq_y_offset + 10 + base_font_size))
+
+        for pos in range(first_pos, last_pos):
+            base = player_seq[pos - alignment_start]
+            color = COLORS[base]
+            x_pos = x_start + (pos - row_start_idx) * char_width
+            
+            # Draw the glowing text
+            glow_surface = cached_glyph(base, base_font, color, glow_alpha)
+            window.blit(glow_surface, (x_pos, row_y + player_seq_y_offset + 10))
+
+    # Multi-read mode: the other reads in smaller lanes stacked under the active one
+    lane_font = get_font(int(base_font_size * 0.6))
+    lane_y_offset = player_seq_y_offset + 20 + base_font_size
+    for lane, (other_seq, other_start) in enumerate(other_reads):
+        other_end = other_start + len(other_seq)
+        for row in visible_rows:
+            row_start_idx = row * GENOME_ROW_LENGTH
+            first_pos = max(row_start_idx, other_start)
+            last_pos = min(row_start_idx + GENOME_ROW_LENGTH, other_end)
+            row_y = y_start + (row - first_row) * row_spacing - scroll_offset
+            lane_y = row_y + lane_y_offset + lane * lane_font.get_linesize()
+            for pos in range(first_pos, last_pos):
+                base = other_seq[pos - other_start]
+                window.blit(cached_glyph(base, lane_font, COLORS[base]),
+                            (x_start + (pos - row_start_idx) * char_width, lane_y))
+
+    window.set_clip(None)
+
+
+@traced
+def draw_buttons(clicked_button, score, optimal_score=None):
     # Create footer section for buttons and instructions
     footer_height = 100 * SCALE_Y
     footer_y = HEIGHT - footer_height
@@ -533,7 +699,7 @@ def draw_buttons(clicked_button, score):
     
     # Helper function to center text in button
     def center_text_in_button(text, button_rect, color):
-        text_surface = font.render(text, True, color)
+        text_surface = allocations.render(font, text, color)
         text_rect = text_surface.get_rect()
         text_rect.center = button_rect.center
         window.blit(text_surface, text_rect)
@@ -543,7 +709,15 @@ def draw_buttons(clicked_button, score):
                            score_width, button_height)
     pygame.draw.rect(window, get_score_color(score), score_rect, border_radius=int(10 * min(SCALE_X, SCALE_Y)))
     score_text = f"Score: {score}"
-    center_text_in_button(score_text, score_rect, BLACK)
+    if optimal_score and optimal_score > 0 and math.isfinite(score):
+        # Score on top, "% of optimal" underneath
+        score_surface = allocations.render(font, score_text, BLACK)
+        percent_surface = allocations.render(small_font, f"{max(0, round(100 * score / optimal_score))}% of optimal", BLACK)
+        gap = (score_rect.height - score_surface.get_height() - percent_surface.get_height()) / 3
+        window.blit(score_surface, score_surface.get_rect(centerx=score_rect.centerx, top=score_rect.top + gap))
+        window.blit(percent_surface, percent_surface.get_rect(centerx=score_rect.centerx, bottom=score_rect.bottom - gap))
+    else:
+        center_text_in_button(score_text, score_rect, BLACK)
     
     # Update button rectangles with new positions and consistent spacing
     x_pos = start_x + score_width + button_spacing
@@ -638,10 +812,9 @@ def draw_buttons(clicked_button, score):
                      window, x_offset + 10 * SCALE_X, y_offset)
             
             y_offset += line_height
-    
-    pygame.display.update()
 
-def draw_leaderboard(leaderboard, score, time, name, status, clicked_button):
+@traced
+def draw_leaderboard(leaderboard, score, time, name, status, clicked_button, seed=None):
     # Clear screen with background
     draw_background()
     draw_banner()
@@ -656,6 +829,12 @@ def draw_leaderboard(leaderboard, score, time, name, status, clicked_button):
         color = BLACK
     
     draw_text(score_text, small_font, color, window, 50 * SCALE_X, BANNER_HEIGHT + (30 * SCALE_Y))
+
+    # The puzzle's seed, so it can be shared and played again
+    if seed is not None:
+        seed_text = f"Daily challenge, puzzle #{seed}" if daily_challenge else f"Puzzle #{seed}"
+        seed_surface = allocations.render(small_font, seed_text, BLACK)
+        window.blit(seed_surface, (WIDTH - seed_surface.get_width() - 50 * SCALE_X, BANNER_HEIGHT + (30 * SCALE_Y)))
     
     # Draw name input box if won
     if status == "won":
@@ -696,76 +875,25 @@ def draw_leaderboard(leaderboard, score, time, name, status, clicked_button):
     # Draw Play Again button
     button_color = (0, 0, 200) if clicked_button == "play_again" else BLUE
     pygame.draw.rect(window, button_color, play_again_button_rect, border_radius=int(10 * min(SCALE_X, SCALE_Y)))
-    text_surface = font.render("Play Again", True, WHITE)
+    text_surface = allocations.render(font, "Play Again", WHITE)
     text_rect = text_surface.get_rect(center=play_again_button_rect.center)
     window.blit(text_surface, text_rect)
     
     # Draw Exit button
     button_color = (180, 0, 0) if clicked_button == "exit" else BRICKRED
     pygame.draw.rect(window, button_color, exit_button_rect, border_radius=int(10 * min(SCALE_X, SCALE_Y)))
-    text_surface = font.render("Exit Game", True, WHITE)
+    text_surface = allocations.render(font, "Exit Game", WHITE)
     text_rect = text_surface.get_rect(center=exit_button_rect.center)
     window.blit(text_surface, text_rect)
     
     pygame.display.update()
     
-def calculate_score(player_seq, genome_seq, alignment_start):
-    """
-    Calculate alignment score with bounds checking:
-    Match: +1
-    Mismatch: -1
-    Gap opening: -2
-    Gap extension: -1
-    """
-    # First check if alignment_start + player sequence length would exceed genome length
-    if alignment_start + len(player_seq) > len(genome_seq):
-        return float('-inf')  # Return very low score if alignment would go out of bounds
-    
-    score = 0
-    gap_open = False
-    
-    for i in range(len(player_seq)):
-        if player_seq[i] == '-':
-            if not gap_open:
-                score += GAP_OPENING  # -2
-                gap_open = True
-            else:
-                score += GAP_EXTENSION  # -1
-        else:
-            gap_open = False
-            try:
-                if player_seq[i] == genome_seq[alignment_start + i]:
-                    score += MATCH  # +1
-                else:
-                    score += MISMATCH  # -1
-            except IndexError:
-                return float('-inf')  # Return very low score if we somehow hit an index error
-                
-    return score
-
-def find_optimal_position(player_seq, genome_seq):
-    """Find the position in the genome sequence that gives the highest alignment score."""
-    max_score = float('-inf')
-    best_position = 0
-    
-    # We know the sequence needs 4 gaps, so the aligned region will be 54 bases long 
-    # (50 bases from player sequence + 4 gaps)
-    optimal_window_size = len(player_seq) + 4
-    
-    # Try every possible position
-    for pos in range(len(genome_seq) - optimal_window_size + 1):
-        score = calculate_score(player_seq, genome_seq, pos)
-        if score > max_score:
-            max_score = score
-            best_position = pos
-    
-    return best_position, max_score
-
 async def main():
     global WIDTH, HEIGHT, SCALE_X, SCALE_Y, font, small_font, submit_button_rect, play_again_button_rect, window
 
     showing_hint = False
     optimal_position = None
+    hint_read = None    # Gapless read in the orientation that reaches the hinted optimum, if known
 
     # Add input cooldown variables
     last_input_time = pygame.time.get_ticks()
@@ -815,31 +943,120 @@ async def main():
     button_a_last_press = 0
     button_b_last_press = 0
     button_x_last_press = 0
+    button_lb_last_press = 0
+    button_rb_last_press = 0
     button_cooldown = 300  # 300ms = 0.3 seconds
+    hud_combo_last_press = 0
+
+    # Hidden performance overlay (F3 or Back+Start on the controller).
+    # F4 / Shift+F4 capture a trace of the next few seconds of play.
+    perf_hud = PerfHUD()
+    # Per-frame allocation counts and a resident-memory leak guard for long
+    # kiosk sessions. F5 toggles tracemalloc tracking, F6 writes a snapshot diff.
+    memory_monitor = MemoryMonitor()
+
+    # Only the rows around the read are drawn; the view follows the read and cursor
+    genome_viewport = GenomeViewport(GENOME_ROW_LENGTH, NUM_GENOME_ROWS)
+    # Whole-genome overview in the banner ('m' switches between match score and composition)
+    genome_minimap = GenomeMinimap(COLORS)
+    # Match/mismatch/gap underline beneath the read, rescored incrementally on edits
+    score_heatmap = ScoreHeatmap()
+    # The other reads of a multi-read puzzle; the active one lives in player_seq/alignment_start
+    read_set = ReadSet(reads_per_puzzle) if reads_per_puzzle > 1 else None
+    # Undo/redo history of the gap edits. The score is only recomputed when the
+    # read, its offset or the puzzle changed since scored_state; undo and redo
+    # restore the logged score without rescoring.
+    edit_log = EditLog()
+    scored_state = None
+    score = 0
 
+    # The player's game is recorded for the leaderboard, and the best recorded
+    # game on the same seed races along as a ghost (single-read puzzles only)
+    replay_recorder = ReplayRecorder()
+    ghost = None
+    tracked_game = None  # start_time of the game the read set, edit log and recorder belong to
+
+    def known_score():
+        # score if it still describes the read; several edits can land in one frame
+        return score if scored_state == (player_seq, alignment_start, genome_seq) else None
+
+    def log_edit(op, index):
+        # Called just before an edit
+        edit_log.record(op, index, alignment_start, known_score())
+
+    def start_new_puzzle(new_status="playing"):
+        # Take the next puzzle and reset the game state for it
+        nonlocal puzzle, genome_seq, player_seq, alignment_start, selected_position, start_time, display_time
+        nonlocal final_score, final_time, player_name, showing_hint, optimal_position, hint_read, status, input_active
+        puzzle = next_puzzle(puzzle_pool)
+        genome_seq, player_seq = puzzle.genome_seq, puzzle.player_seq
+        genome_viewport.reset(len(genome_seq))
+        genome_minimap.set_puzzle(genome_seq, player_seq)
+        alignment_start = 0
+        selected_position = None
+        start_time = pygame.time.get_ticks()
+        display_time = 0
+        final_score = 0
+        final_time = 10000
+        player_name = ""
+        showing_hint = False
+        optimal_position = None
+        hint_read = None
+        status = new_status
+        input_active = False
+    # Start sampling reads in the background while the intro plays
+    if read_sampler is not None:
+        read_sampler.start()
+    # Ready-made puzzles (with their optimal placement) so Play Again is instant
+    puzzle_pool = PuzzlePool(generate_puzzle, both_strands=both_strands and sequence_mode == "dna",
+                             extra_reads=reads_per_puzzle - 1, make_read=generate_extra_read)
+    if not daily_challenge and puzzle_seed is None:
+        puzzle_pool.start()
+
+    # Play the intro from the pre-rendered sprite sheet. Each frame is a small
+    # patch blitted onto a canvas at the sheet's native size; the canvas is only
+    # rescaled to the window when a patch actually changed it, into a surface
+    # that is reallocated only when the window size changes.
+    intro = load_intro_animation()
+    playing_video = intro is not None
+    if playing_video:
+        intro_sheet, intro_meta = intro
+        intro_frames = intro_meta["frames"]
+        intro_canvas = allocations.new_surface((intro_meta["width"], intro_meta["height"]))
+        intro_frame_starts = []
+        intro_duration = 0
+        for frame in intro_frames:
+            intro_frame_starts.append(intro_duration)
+            intro_duration += frame["ms"]
+        intro_frame_index = -1
+        intro_dirty = False
+        intro_scaled = None
 
-    clip = VideoFileClip(video_path)
-    video_surface = pygame.Surface((WIDTH, HEIGHT))
-    
-    # Move the video drawing logic outside of a nested function
     start_time = pygame.time.get_ticks()
-    video_duration = clip.duration
-    playing_video = True
 
     while playing_video:
         current_time = pygame.time.get_ticks()
-        t = (current_time - start_time) / 1000
-        if t >= video_duration:
+        t = current_time - start_time
+        if t >= intro_duration:
             playing_video = False
             break
-            
-        # Draw the current video frame
-        frame = clip.get_frame(t)
-        frame_surface = pygame.surfarray.make_surface(frame.swapaxes(0, 1))
-        frame_surface = pygame.transform.scale(frame_surface, (WIDTH, HEIGHT))
-        video_surface.blit(frame_surface, (0, 0))
-        window.blit(video_surface, (0, 0))
-        pygame.display.update()
+
+        # Apply every patch that is due (usually zero or one per loop)
+        while (intro_frame_index + 1 < len(intro_frames) and
+               intro_frame_starts[intro_frame_index + 1] <= t):
+            intro_frame_index += 1
+            frame = intro_frames[intro_frame_index]
+            intro_canvas.blit(intro_sheet, (frame["x"], frame["y"]),
+                              (frame["sx"], frame["sy"], frame["w"], frame["h"]))
+            intro_dirty = True
+
+        if intro_dirty:
+            if intro_scaled is None or intro_scaled.get_size() != (WIDTH, HEIGHT):
+                intro_scaled = allocations.new_surface((WIDTH, HEIGHT), 0, intro_canvas)  # Same format as the canvas
+            pygame.transform.scale(intro_canvas, (WIDTH, HEIGHT), intro_scaled)
+            window.blit(intro_scaled, (0, 0))
+            pygame.display.update()
+            intro_dirty = False
         
         # Only check for inputs if enough time has passed
         if current_time - last_input_time >= input_cooldown:
@@ -878,13 +1095,14 @@ async def main():
                 # Update font sizes with better scaling
                 font_size = int(36 * min(SCALE_X, SCALE_Y))
                 small_font_size = int(24 * min(SCALE_X, SCALE_Y))
-                font = pygame.font.SysFont('Arial', font_size)
-                small_font = pygame.font.SysFont('Arial', small_font_size)
+                font = allocations.sys_font('Arial', font_size)
+                small_font = allocations.sys_font('Arial', small_font_size)
     
                 # Update button positions
                 submit_button_rect.update(50 * SCALE_X, HEIGHT - 100 * SCALE_Y, 200 * SCALE_X, 50 * SCALE_Y)
                 play_again_button_rect.update(300 * SCALE_X, HEIGHT - 100 * SCALE_Y, 200 * SCALE_X, 50 * SCALE_Y)
                 exit_button_rect.update(550 * SCALE_X, HEIGHT - 100 * SCALE_Y, 160 * SCALE_X, 50 * SCALE_Y)
+                intro_dirty = True
                     
         await asyncio.sleep(0)
 
@@ -928,8 +1146,8 @@ async def main():
                 # Update font sizes with better scaling
                 font_size = int(36 * min(SCALE_X, SCALE_Y))
                 small_font_size = int(24 * min(SCALE_X, SCALE_Y))
-                font = pygame.font.SysFont('Arial', font_size)
-                small_font = pygame.font.SysFont('Arial', small_font_size)
+                font = allocations.sys_font('Arial', font_size)
+                small_font = allocations.sys_font('Arial', small_font_size)
     
                 # Update button positions
                 submit_button_rect.update(50 * SCALE_X, HEIGHT - 100 * SCALE_Y, 200 * SCALE_X, 50 * SCALE_Y)
@@ -938,26 +1156,77 @@ async def main():
 
     pygame.key.set_repeat(150, 20)
     running = True
-    genome_seq = generate_dna_sequence(250)
-    player_seq = generate_player_sequence_from_genome(genome_seq)
-    alignment_start = 0
-    selected_position = None
+    puzzle = genome_seq = None
     clicked_button = None
-    start_time = pygame.time.get_ticks()
-    display_time = 0
-    status = "playing"
+    hint_search = None
     leaderboard = [{"name":"BLAST", "score":50, "time": 0.2}]
-    final_score = 0
-    final_time = 10000
-    player_name = ""
-    input_active = False
+    start_new_puzzle()
 
     while running:
+        perf_hud.begin_frame()
+        tracer.frame()
+        memory_monitor.frame("playing" if status == "playing" else "leaderboard", pygame.time.get_ticks())
+        perf_hud.record_memory(memory_monitor.last_frame_blocks,
+                               memory_monitor.last_frame_bytes if memory_monitor.tracking else None)
         if status == "playing":
             current_time = pygame.time.get_ticks()
-            draw_sequences(player_seq, genome_seq, alignment_start, selected_position, current_time, showing_hint, optimal_position, display_time=display_time)
-            score = calculate_score(player_seq, genome_seq, alignment_start)
-            draw_buttons(clicked_button, score)
+            if hint_search is not None:
+                if not showing_hint or hint_search.genome_seq is not genome_seq:
+                    hint_search.cancel()  # Hint toggled off or a new puzzle started
+                    hint_search = None
+                else:
+                    if hint_search.player_seq != player_seq:
+                        # The read was edited; restart on the new read
+                        hint_search.cancel()
+                        hint_search = HintSearch(player_seq, genome_seq)
+                        hint_search.start(asyncio.get_running_loop())
+                    hint_search.step()
+                    optimal_position = hint_search.best_position  # Provisional until done
+            if tracked_game != start_time:
+                # A new game started. Seeded puzzles come from the cache, so the same
+                # puzzle object can come back; the start time tells games apart.
+                tracked_game = start_time
+                if read_set is not None:
+                    optimum = None
+                    if puzzle.max_score is not None and puzzle.extra_max_score is not None:
+                        optimum = puzzle.max_score + puzzle.extra_max_score
+                    read_set.new_puzzle(genome_seq, (player_seq,) + puzzle.extra_reads, optimum)
+                else:
+                    replay_recorder.start(player_seq, alignment_start)
+                    ghost = leader_ghost(leaderboard, puzzle)
+            edit_log.track(start_time, read_set.active if read_set is not None else 0)
+            if read_set is not None:
+                read_set.store(player_seq, alignment_start)
+            else:
+                replay_recorder.record(player_seq, alignment_start, current_time - start_time)
+                if ghost is not None:
+                    ghost.advance(current_time - start_time)
+            genome_viewport.follow(alignment_start, len(player_seq), selected_position)
+            genome_viewport.update(current_time)
+            score_heatmap.update(player_seq, genome_seq, alignment_start)
+            hint_flip = hint_read is not None and player_seq.replace('-', '') != hint_read
+            # Multi-read puzzles show the other reads instead of a ghost
+            if read_set is not None:
+                other_reads, read_label, shown_ghost = read_set.inactive(), f"Read {read_set.active + 1}/{read_set.count}:", None
+            else:
+                other_reads, read_label, shown_ghost = (), "Read:", ghost
+            draw_sequences(player_seq, genome_seq, alignment_start, selected_position, current_time, showing_hint, optimal_position, display_time=display_time, view_row=genome_viewport.row, heatmap=score_heatmap,
+                           other_reads=other_reads, read_label=read_label, ghost=shown_ghost, hint_flip=hint_flip)
+            perf_hud.mark("draw_sequences")
+            view_start = int(genome_viewport.row) * GENOME_ROW_LENGTH
+            genome_minimap.draw(window, get_minimap_rect(), alignment_start, len(player_seq),
+                                view_start, view_start + NUM_GENOME_ROWS * GENOME_ROW_LENGTH)
+            perf_hud.mark("minimap")
+            if scored_state != (player_seq, alignment_start, genome_seq):
+                score = current_score(read_set, player_seq, genome_seq, alignment_start)
+                scored_state = (player_seq, alignment_start, genome_seq)
+            perf_hud.mark("calculate_score")
+            draw_buttons(clicked_button, score, read_set.max_score if read_set is not None else puzzle.max_score)
+            perf_hud.mark("draw_buttons")
+            perf_hud.draw(window, current_time)
+            perf_hud.mark("hud")
+            pygame.display.update()
+            perf_hud.mark("display.update")
             elapsed_time = (current_time - start_time) / 1000
             if elapsed_time - display_time >= 0.1:
                 display_time = elapsed_time
@@ -1256,6 +1525,7 @@ async def main():
                     current_time = pygame.time.get_ticks()
                     if current_time - button_a_last_press >= button_cooldown:
                         if selected_position >= alignment_start and selected_position < alignment_start + len(player_seq) - 1:
+                            log_edit(INSERT_GAP, selected_position - alignment_start)
                             player_seq = player_seq[:selected_position-alignment_start] + '-' + player_seq[selected_position-alignment_start:]
                             button_a_last_press = current_time
 
@@ -1265,13 +1535,31 @@ async def main():
                     if current_time - button_b_last_press >= button_cooldown:
                         if selected_position >= alignment_start and selected_position < alignment_start + len(player_seq) - 1:
                             if player_seq[selected_position-alignment_start] == '-':
+                                log_edit(DELETE_GAP, selected_position - alignment_start)
                                 player_seq = player_seq[:selected_position-alignment_start] + player_seq[selected_position-alignment_start+1:]
                                 button_b_last_press = current_time
 
+                # Left bumper undoes the last gap edit, Back + left bumper redoes it
+                if joystick.get_numbuttons() > BUTTON_LB and joystick.get_button(BUTTON_LB):
+                    current_time = pygame.time.get_ticks()
+                    if current_time - button_lb_last_press >= button_cooldown:
+                        if joystick.get_numbuttons() > BUTTON_BACK and joystick.get_button(BUTTON_BACK):
+                            replayed = edit_log.redo(player_seq, alignment_start, known_score())
+                        else:
+                            replayed = edit_log.undo(player_seq, alignment_start, known_score())
+                        if replayed is not None:
+                            player_seq, restored_score = replayed
+                            if restored_score is not None:
+                                score = restored_score
+                                scored_state = (player_seq, alignment_start, genome_seq)
+                        button_lb_last_press = current_time
+
                 if joystick.get_button(BUTTON_Y):
                     clicked_button = "submit"
                     status = "score"
-                    final_score = calculate_score(player_seq, genome_seq, alignment_start)
+                    final_score = current_score(read_set, player_seq, genome_seq, alignment_start)
+                    if read_set is None:
+                        replay_recorder.record(player_seq, alignment_start, pygame.time.get_ticks() - start_time)
                     final_time = elapsed_time
                     if len(leaderboard) < 10 or final_score > leaderboard[-1]["score"] or (final_score == leaderboard[-1]["score"] and final_time < leaderboard[-1]["time"]):
                         status = "won"
@@ -1285,19 +1573,7 @@ async def main():
                     current_time = pygame.time.get_ticks()
                     if current_time - button_x_last_press >= button_cooldown:
                         clicked_button = "play_again"
-                        genome_seq = generate_dna_sequence(250)
-                        player_seq = generate_player_sequence_from_genome(genome_seq)
-                        alignment_start = 0
-                        selected_position = None
-                        start_time = pygame.time.get_ticks()
-                        display_time = 0
-                        final_score = 0
-                        final_time = 10000
-                        player_name = ""
-                        showing_hint = False
-                        optimal_position = None
-                        status = "playing"
-                        input_active = False
+                        start_new_puzzle()
                         button_x_last_press = current_time
 
                 if joystick.get_button(BUTTON_X) and joystick.get_button(BUTTON_Y):  # Press X+Y together to restart
@@ -1305,19 +1581,7 @@ async def main():
                     if current_time - button_x_last_press >= button_cooldown:
                         clicked_button = "instructions"
                         # Reset everything and go back to start screen
-                        genome_seq = generate_dna_sequence(250)
-                        player_seq = generate_player_sequence_from_genome(genome_seq)
-                        alignment_start = 0
-                        selected_position = None
-                        start_time = pygame.time.get_ticks()
-                        display_time = 0
-                        final_score = 0
-                        final_time = 10000
-                        player_name = ""
-                        showing_hint = False
-                        optimal_position = None
-                        status = "start"
-                        input_active = False
+                        start_new_puzzle("start")
                         draw_start_screen()
                         waiting_for_start = True
                         while waiting_for_start:
@@ -1358,14 +1622,33 @@ async def main():
                                     # Update font sizes with better scaling
                                     font_size = int(36 * min(SCALE_X, SCALE_Y))
                                     small_font_size = int(24 * min(SCALE_X, SCALE_Y))
-                                    font = pygame.font.SysFont('Arial', font_size)
-                                    small_font = pygame.font.SysFont('Arial', small_font_size)
+                                    font = allocations.sys_font('Arial', font_size)
+                                    small_font = allocations.sys_font('Arial', small_font_size)
                         
                                     # Update button positions
                                     submit_button_rect.update(50 * SCALE_X, HEIGHT - 100 * SCALE_Y, 200 * SCALE_X, 50 * SCALE_Y)
                                     play_again_button_rect.update(300 * SCALE_X, HEIGHT - 100 * SCALE_Y, 200 * SCALE_X, 50 * SCALE_Y)
                                     exit_button_rect.update(550 * SCALE_X, HEIGHT - 100 * SCALE_Y, 160 * SCALE_X, 50 * SCALE_Y)
 
+                if read_set is not None and joystick.get_numbuttons() > BUTTON_RB and joystick.get_button(BUTTON_RB):
+                    current_time = pygame.time.get_ticks()
+                    if current_time - button_rb_last_press >= button_cooldown:
+                        # Next read of a multi-read puzzle
+                        read_set.store(player_seq, alignment_start)
+                        player_seq, alignment_start = read_set.select(read_set.active + 1)
+                        selected_position = None
+                        showing_hint = False
+                        optimal_position = None
+                        button_rb_last_press = current_time
+
+                if joystick.get_numbuttons() > BUTTON_START and joystick.get_button(BUTTON_BACK) and joystick.get_button(BUTTON_START):
+                    current_time = pygame.time.get_ticks()
+                    if current_time - hud_combo_last_press >= button_cooldown:
+                        perf_hud.toggle()
+                        hud_combo_last_press = current_time
+
+            perf_hud.mark("input")
+
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     running = False
@@ -1374,7 +1657,9 @@ async def main():
                     if submit_button_rect.collidepoint(mouse_pos):
                         clicked_button = "submit"
                         status = "score"
-                        final_score = calculate_score(player_seq, genome_seq, alignment_start)
+                        final_score = current_score(read_set, player_seq, genome_seq, alignment_start)
+                        if read_set is None:
+                            replay_recorder.record(player_seq, alignment_start, pygame.time.get_ticks() - start_time)
                         final_time = elapsed_time
                         if len(leaderboard) < 10 or final_score > leaderboard[-1]["score"] or (final_score == leaderboard[-1]["score"] and final_time < leaderboard[-1]["time"]):
                             status = "won"
@@ -1383,34 +1668,14 @@ async def main():
                             status = "lost"
                     elif play_again_button_rect.collidepoint(mouse_pos):
                         clicked_button = "play_again"
-                        genome_seq = generate_dna_sequence(250)
-                        player_seq = generate_player_sequence_from_genome(genome_seq)
-                        alignment_start = 0
-                        selected_position = None
-                        start_time = pygame.time.get_ticks()
-                        display_time = 0
-                        final_score = 0
-                        final_time = 10000
-                        player_name = ""
-                        showing_hint = False
-                        optimal_position = None
-                        status = "playing"
-                        input_active = False
+                        start_new_puzzle()
                     elif exit_button_rect.collidepoint(mouse_pos):
                         clicked_button = "exit"
                         running = False  # This will exit the game
                     elif instructions_button_rect.collidepoint(mouse_pos):
                         clicked_button = "instructions"
                         # Reset everything but ensure we go back to playing state
-                        genome_seq = generate_dna_sequence(250)
-                        player_seq = generate_player_sequence_from_genome(genome_seq)
-                        alignment_start = 0
-                        selected_position = None
-                        start_time = pygame.time.get_ticks()
-                        display_time = 0
-                        showing_hint = False
-                        optimal_position = None
-                        input_active = False
+                        start_new_puzzle()
                         
                         # Show instructions screen
                         draw_start_screen()
@@ -1453,8 +1718,8 @@ async def main():
                                     # Update font sizes with better scaling
                                     font_size = int(36 * min(SCALE_X, SCALE_Y))
                                     small_font_size = int(24 * min(SCALE_X, SCALE_Y))
-                                    font = pygame.font.SysFont('Arial', font_size)
-                                    small_font = pygame.font.SysFont('Arial', small_font_size)
+                                    font = allocations.sys_font('Arial', font_size)
+                                    small_font = allocations.sys_font('Arial', small_font_size)
                         
                                     # Update button positions
                                     submit_button_rect.update(50 * SCALE_X, HEIGHT - 100 * SCALE_Y, 200 * SCALE_X, 50 * SCALE_Y)
@@ -1463,20 +1728,64 @@ async def main():
                 elif event.type == pygame.MOUSEBUTTONUP:
                     clicked_button = None
                 elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_y:
+                    if event.key == pygame.K_F3:
+                        perf_hud.toggle()
+                    elif event.key == pygame.K_F4:
+                        # F4 captures a Chrome trace, Shift+F4 a cProfile run
+                        tracer.start_capture(mode="cprofile" if event.mod & pygame.KMOD_SHIFT else "chrome")
+                    elif event.key == pygame.K_F5:
+                        memory_monitor.toggle_tracking()
+                    elif event.key == pygame.K_F6:
+                        memory_monitor.write_snapshot_diff()
+                    elif event.key == pygame.K_m:
+                        genome_minimap.toggle_mode()
+                    elif event.key == pygame.K_r and both_strands and sequence_mode == "dna":
+                        # Flip the read to the other strand
+                        log_edit(FLIP, 0)
+                        player_seq = reverse_complement(player_seq)
+                    elif event.key == pygame.K_z:
+                        # Z undoes the last gap edit, Shift+Z redoes it
+                        if event.mod & pygame.KMOD_SHIFT:
+                            replayed = edit_log.redo(player_seq, alignment_start, known_score())
+                        else:
+                            replayed = edit_log.undo(player_seq, alignment_start, known_score())
+                        if replayed is not None:
+                            player_seq, restored_score = replayed
+                            if restored_score is not None:
+                                score = restored_score
+                                scored_state = (player_seq, alignment_start, genome_seq)
+                    elif event.key == pygame.K_TAB and read_set is not None:
+                        # Next read of a multi-read puzzle
+                        read_set.store(player_seq, alignment_start)
+                        player_seq, alignment_start = read_set.select(read_set.active + 1)
+                        selected_position = None
+                        showing_hint = False
+                        optimal_position = None
+                    elif event.key == pygame.K_y:
                         if not showing_hint:
-                            optimal_position, max_score = find_optimal_position(player_seq, genome_seq)
+                            if puzzle.report is not None and (read_set is None or read_set.active == 0):
+                                # Solved when the puzzle was generated, so this is instant. The
+                                # position is for the strand in report.strand, which may need a flip
+                                optimal_position, max_score = puzzle.optimal_position, puzzle.max_score
+                                hint_read = puzzle.report.solution.replace('-', '')
+                            else:
+                                # Too large to solve up front; search in the background
+                                hint_read = None
+                                hint_search = HintSearch(player_seq, genome_seq)
+                                hint_search.start(asyncio.get_running_loop())
                             showing_hint = True
                         else:
                             showing_hint = False
                             optimal_position = None
                     elif event.key == pygame.K_SPACE and selected_position is not None:
                         if selected_position >= alignment_start and selected_position < alignment_start + len(player_seq) - 1:
+                            log_edit(INSERT_GAP, selected_position - alignment_start)
                             player_seq = player_seq[:selected_position-alignment_start] + '-' + player_seq[selected_position-alignment_start:]
 
                     if event.key == pygame.K_BACKSPACE and selected_position is not None:
                         if selected_position >= alignment_start and selected_position < alignment_start + len(player_seq) - 1:
                             if player_seq[selected_position-alignment_start] == '-':
+                                log_edit(DELETE_GAP, selected_position - alignment_start)
                                 player_seq = player_seq[:selected_position-alignment_start] + player_seq[selected_position-alignment_start+1:]
 
                     if event.key == pygame.K_LEFT:
@@ -1530,15 +1839,17 @@ async def main():
                     # Update font sizes with better scaling
                     font_size = int(36 * min(SCALE_X, SCALE_Y))
                     small_font_size = int(24 * min(SCALE_X, SCALE_Y))
-                    font = pygame.font.SysFont('Arial', font_size)
-                    small_font = pygame.font.SysFont('Arial', small_font_size)
+                    font = allocations.sys_font('Arial', font_size)
+                    small_font = allocations.sys_font('Arial', small_font_size)
     
                     # Update button positions
                     submit_button_rect.update(50 * SCALE_X, HEIGHT - 100 * SCALE_Y, 200 * SCALE_X, 50 * SCALE_Y)
                     play_again_button_rect.update(300 * SCALE_X, HEIGHT - 100 * SCALE_Y, 200 * SCALE_X, 50 * SCALE_Y)
                     exit_button_rect.update(550 * SCALE_X, HEIGHT - 100 * SCALE_Y, 160 * SCALE_X, 50 * SCALE_Y)
+
+            perf_hud.mark("events")
         elif status in ["won", "lost"]:
-            draw_leaderboard(leaderboard, final_score, final_time, player_name, status, clicked_button)
+            draw_leaderboard(leaderboard, final_score, final_time, player_name, status, clicked_button, puzzle.seed)
             
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
@@ -1548,18 +1859,7 @@ async def main():
                     if play_again_button_rect.collidepoint(mouse_pos):
                         clicked_button = "play_again"
                         # Reset game state and start over
-                        genome_seq = generate_dna_sequence(250)
-                        player_seq = generate_player_sequence_from_genome(genome_seq)
-                        alignment_start = 0
-                        selected_position = None
-                        start_time = pygame.time.get_ticks()
-                        final_score = 0
-                        final_time = 10000
-                        player_name = ""
-                        showing_hint = False
-                        optimal_position = None
-                        status = "playing"
-                        input_active = False
+                        start_new_puzzle()
                     elif exit_button_rect.collidepoint(mouse_pos):
                         clicked_button = "exit"
                         running = False
@@ -1568,24 +1868,13 @@ async def main():
                     mouse_pos = pygame.mouse.get_pos()
                     if play_again_button_rect.collidepoint(mouse_pos):
                         clicked_button = "play_again"
-                        genome_seq = generate_dna_sequence(250)
-                        player_seq = generate_player_sequence_from_genome(genome_seq)
-                        alignment_start = 0
-                        selected_position = None
-                        start_time = pygame.time.get_ticks()
-                        display_time = 0
-                        final_score = 0
-                        final_time = 10000
-                        player_name = ""
-                        showing_hint = False
-                        optimal_position = None
-                        status = "playing"
-                        input_active = False
+                        start_new_puzzle()
                 elif event.type == pygame.MOUSEBUTTONUP:
                     clicked_button = None
                 elif event.type == pygame.KEYDOWN and input_active:
                     if event.key == pygame.K_RETURN and player_name:
-                        leaderboard.append({'name': player_name, 'score': final_score, 'time': final_time})
+                        leaderboard.append({'name': player_name, 'score': final_score, 'time': final_time, 'seed': puzzle.seed,
+                                            'replay': replay_recorder.encode() if read_set is None else None})
                         leaderboard = sorted(leaderboard, key=lambda x: (-x['score'], x['time'], x['name']))
                         if len(leaderboard) > 10:
                             leaderboard.pop()
@@ -1626,8 +1915,8 @@ async def main():
                     # Update font sizes with better scaling
                     font_size = int(36 * min(SCALE_X, SCALE_Y))
                     small_font_size = int(24 * min(SCALE_X, SCALE_Y))
-                    font = pygame.font.SysFont('Arial', font_size)
-                    small_font = pygame.font.SysFont('Arial', small_font_size)
+                    font = allocations.sys_font('Arial', font_size)
+                    small_font = allocations.sys_font('Arial', small_font_size)
     
                     # Update button positions
                     submit_button_rect.update(50 * SCALE_X, HEIGHT - 100 * SCALE_Y, 200 * SCALE_X, 50 * SCALE_Y)
@@ -1638,4 +1927,5 @@ async def main():
 
     pygame.quit()
 
-asyncio.run(main())
\ No newline at end of file
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,42 @@
+"""
+Write a synthetic random genome as an indexed FASTA file.
+
+The sequence is generated and written in chunks, so genomes far larger than
+memory can be produced. The .fai index is written alongside, so main.py
+(reference_fasta_path) and fasta.FastaFile can open the result straight away.
+
+Usage:
+    python make_genome.py synthetic.fa --length 100000000 --gc 0.42 --seed 7
+"""
+import argparse
+
+from alignment import iter_dna_chunks
+from fasta import FaiRecord, write_fai
+
+LINE_WIDTH = 60
+
+
+def write_genome(path, length, name="synthetic", gc_content=0.5, seed=None,
+                 line_width=LINE_WIDTH, chunk_lines=16_384):
+    """Stream `length` random bases to a FASTA file and write its .fai index."""
+    header = f">{name} length={length} gc={gc_content}\n"
+    with open(path, "w", newline="\n") as f:
+        f.write(header)
+        chunk_size = line_width * chunk_lines  # Whole lines per chunk keep the wrapping simple
+        for chunk in iter_dna_chunks(length, chunk_size, gc_content, seed):
+            f.write("\n".join(chunk[i:i + line_width] for i in range(0, len(chunk), line_width)))
+            f.write("\n")
+    write_fai([FaiRecord(name, length, len(header), line_width, line_width + 1)], path + ".fai")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a random genome as an indexed FASTA file")
+    parser.add_argument("path")
+    parser.add_argument("--length", type=int, required=True, help="number of bases")
+    parser.add_argument("--name", default="synthetic", help="record name")
+    parser.add_argument("--gc", type=float, default=0.5, help="GC content, 0..1")
+    parser.add_argument("--seed", type=int, help="seed for a reproducible genome")
+    parser.add_argument("--line-width", type=int, default=LINE_WIDTH)
+    args = parser.parse_args()
+    write_genome(args.path, args.length, args.name, args.gc, args.seed, args.line_width)
+    print(f"Wrote {args.length:,} bases to {args.path}")
@@ -0,0 +1,131 @@
+"""
+Offline converter for the intro animation.
+
+Turns zymologo.mov into a sprite sheet (zymologo_intro.png) plus a frame table
+(zymologo_intro.json) that main.py plays back with plain blits. This is the only
+place moviepy is needed, so the game itself runs in the pygbag web build too.
+
+Each frame is stored as a delta against the canvas the game will have drawn so
+far: only the bounding box of the pixels that differ is packed into the sheet,
+and frames that do not change at all are folded into the previous entry's
+duration. Diffing against the reconstructed canvas rather than the previous
+video frame keeps small changes under the threshold from adding up into drift.
+
+Usage:
+    python make_intro_sheet.py zymologo.mov --fps 15 --width 640
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+import pygame
+from moviepy.video.io.VideoFileClip import VideoFileClip
+
+SHEET_MAX_WIDTH = 2048  # Keep the sheet texture-friendly for WebGL/mobile GPUs
+KEYFRAME_AREA = 0.6     # Store a full frame when more than 60% of it changed
+
+
+def resize_frame(frame, width, height):
+    # Let pygame do the resampling so the converter does not need PIL
+    surface = pygame.surfarray.make_surface(frame.swapaxes(0, 1))
+    surface = pygame.transform.smoothscale(surface, (width, height))
+    return pygame.surfarray.array3d(surface).swapaxes(0, 1)
+
+
+def changed_bbox(previous, frame, threshold):
+    """Return (x, y, w, h) of the pixels that differ from `previous`, or None."""
+    diff = np.abs(frame.astype(np.int16) - previous.astype(np.int16)).max(axis=2) > threshold
+    rows = np.flatnonzero(diff.any(axis=1))
+    if len(rows) == 0:
+        return None
+    cols = np.flatnonzero(diff.any(axis=0))
+    return (int(cols[0]), int(rows[0]),
+            int(cols[-1] - cols[0] + 1), int(rows[-1] - rows[0] + 1))
+
+
+def pack_patches(patches):
+    """
+    Shelf-pack patch sizes into a sheet.
+    Returns the sheet size and the (sx, sy) position of every patch.
+    """
+    order = sorted(range(len(patches)), key=lambda i: -patches[i][1])
+    positions = [None] * len(patches)
+    shelf_x = shelf_y = shelf_height = 0
+    sheet_width = 0
+    for i in order:
+        w, h = patches[i]
+        if shelf_x + w > SHEET_MAX_WIDTH:
+            shelf_y += shelf_height
+            shelf_x = shelf_height = 0
+        positions[i] = (shelf_x, shelf_y)
+        shelf_x += w
+        shelf_height = max(shelf_height, h)
+        sheet_width = max(sheet_width, shelf_x)
+    return (sheet_width, shelf_y + shelf_height), positions
+
+
+def convert(video_path, out_prefix, fps, width, threshold):
+    clip = VideoFileClip(video_path)
+    height = int(round(width * clip.h / clip.w))
+    frame_ms = 1000 / fps
+    frame_count = int(clip.duration * fps)
+    if frame_count == 0:
+        clip.close()
+        raise ValueError(f"{video_path} is too short for a single frame at {fps} fps")
+
+    entries = []  # [x, y, w, h, duration_ms]
+    images = []
+    canvas = None  # What playback shows after the entries so far
+    for n in range(frame_count):
+        frame = resize_frame(clip.get_frame(n / fps), width, height)
+        if canvas is None:
+            bbox = (0, 0, width, height)
+            canvas = frame.copy()
+        else:
+            bbox = changed_bbox(canvas, frame, threshold)
+        if bbox is None:
+            # Nothing moved - just hold the previous frame longer
+            entries[-1][4] += frame_ms
+            continue
+        x, y, w, h = bbox
+        if w * h > KEYFRAME_AREA * width * height:
+            x, y, w, h = 0, 0, width, height
+        entries.append([x, y, w, h, frame_ms])
+        images.append(frame[y:y + h, x:x + w])
+        canvas[y:y + h, x:x + w] = frame[y:y + h, x:x + w]
+    clip.close()
+
+    (sheet_w, sheet_h), positions = pack_patches([(e[2], e[3]) for e in entries])
+    sheet = np.zeros((sheet_h, sheet_w, 3), dtype=np.uint8)
+    for image, (sx, sy) in zip(images, positions):
+        sheet[sy:sy + image.shape[0], sx:sx + image.shape[1]] = image
+
+    pygame.image.save(pygame.surfarray.make_surface(sheet.swapaxes(0, 1)), out_prefix + ".png")
+    meta = {
+        "source": os.path.basename(video_path),
+        "width": width,
+        "height": height,
+        "frames": [
+            {"x": x, "y": y, "w": w, "h": h, "sx": sx, "sy": sy, "ms": int(round(ms))}
+            for (x, y, w, h, ms), (sx, sy) in zip(entries, positions)
+        ],
+    }
+    with open(out_prefix + ".json", "w") as f:
+        json.dump(meta, f, separators=(",", ":"))
+
+    raw_bytes = frame_count * width * height * 3
+    print(f"{frame_count} video frames -> {len(entries)} patches, "
+          f"sheet {sheet_w}x{sheet_h} ({sheet.nbytes / raw_bytes:.1%} of raw frames)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert the intro video into a sprite sheet")
+    parser.add_argument("video", nargs="?", default="zymologo.mov")
+    parser.add_argument("--out", default="zymologo_intro", help="output prefix for .png/.json")
+    parser.add_argument("--fps", type=float, default=15)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--threshold", type=int, default=8,
+                        help="per-channel difference below which a pixel counts as unchanged")
+    args = parser.parse_args()
+    convert(args.video, args.out, args.fps, args.width, args.threshold)
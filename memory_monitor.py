@@ -0,0 +1,162 @@
+"""
+Allocation tracking and leak guard for long-running kiosk sessions.
+
+Always on (and cheap): the net number of allocated Python blocks per frame and
+per scene, plus a resident-memory sample every SAMPLE_INTERVAL_MS whose trend
+is fitted over the session; a warning is printed when it keeps climbing.
+
+On demand (F5): tracemalloc tracking, which adds bytes allocated per frame and
+lets F6 write a snapshot diff against the moment tracking started.
+"""
+import os
+import sys
+import time
+import tracemalloc
+from collections import deque
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+SAMPLE_INTERVAL_MS = 60_000      # Resident memory sample period
+TREND_MIN_SAMPLES = 15           # Don't judge the trend before ~15 minutes
+TREND_WINDOW = 240               # Fit the slope over the last 4 hours of samples
+LEAK_WARN_MB_PER_HOUR = 16       # Sustained growth above this triggers a warning
+WARN_INTERVAL_MS = 30 * 60_000   # Repeat the warning at most every 30 minutes
+SNAPSHOT_TOP = 40                # Lines written per snapshot diff
+
+
+def resident_memory():
+    """Resident set size of this process in bytes, or None if it can't be read."""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        # No /proc or sysconf on Windows and the web build
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    if tracemalloc.is_tracing():
+        return tracemalloc.get_traced_memory()[0]
+    return None
+
+
+def slope_per_hour(samples):
+    """Least-squares slope of (ms, bytes) samples, in bytes per hour."""
+    n = len(samples)
+    mean_t = sum(t for t, _ in samples) / n
+    mean_v = sum(v for _, v in samples) / n
+    var_t = sum((t - mean_t) ** 2 for t, _ in samples)
+    if var_t == 0:
+        return 0
+    cov = sum((t - mean_t) * (v - mean_v) for t, v in samples)
+    return cov / var_t * 3_600_000
+
+
+class SceneStats:
+    __slots__ = ("frames", "blocks", "bytes")
+
+    def __init__(self):
+        self.frames = 0
+        self.blocks = 0
+        self.bytes = 0
+
+
+class MemoryMonitor:
+    def __init__(self):
+        self.scenes = {}                    # scene name -> SceneStats
+        self.samples = deque(maxlen=TREND_WINDOW)
+        self.last_frame_blocks = 0          # net blocks allocated during the last frame
+        self.last_frame_bytes = 0           # bytes allocated during the last frame (tracking only)
+        self.tracking = False
+        self._traced_start = 0
+        self._scene = None
+        self._blocks = sys.getallocatedblocks()
+        self._last_sample = None
+        self._last_warning = None
+        self._baseline_snapshot = None
+
+    def frame(self, scene, current_time):
+        """Call once per game-loop iteration with the current scene name."""
+        blocks = sys.getallocatedblocks()
+        self.last_frame_blocks = blocks - self._blocks
+        self._blocks = blocks
+        if self.tracking:
+            current, peak = tracemalloc.get_traced_memory()
+            self.last_frame_bytes = peak - self._traced_start
+            tracemalloc.reset_peak()
+            self._traced_start = current
+
+        if self._scene is not None:
+            stats = self.scenes.setdefault(self._scene, SceneStats())
+            stats.frames += 1
+            stats.blocks += self.last_frame_blocks
+            stats.bytes += self.last_frame_bytes
+        if scene != self._scene and self._scene is not None:
+            print(self.scene_report(self._scene))
+        self._scene = scene
+
+        if self._last_sample is None or current_time - self._last_sample >= SAMPLE_INTERVAL_MS:
+            self._last_sample = current_time
+            self.sample(current_time)
+
+    def sample(self, current_time):
+        rss = resident_memory()
+        if rss is None:
+            return
+        self.samples.append((current_time, rss))
+        if len(self.samples) < TREND_MIN_SAMPLES:
+            return
+        growth = slope_per_hour(self.samples) / (1024 * 1024)
+        if growth > LEAK_WARN_MB_PER_HOUR and (
+                self._last_warning is None or current_time - self._last_warning >= WARN_INTERVAL_MS):
+            self._last_warning = current_time
+            print(f"WARNING: resident memory growing {growth:.1f} MB/hour "
+                  f"(now {rss / (1024 * 1024):.0f} MB)")
+            if self.tracking:
+                self.write_snapshot_diff()
+
+    def toggle_tracking(self):
+        """Start or stop tracemalloc; the first snapshot becomes the diff baseline."""
+        if self.tracking:
+            tracemalloc.stop()
+            self.tracking = False
+            self._baseline_snapshot = None
+            self.last_frame_bytes = 0
+            print("Allocation tracking off")
+            return
+        tracemalloc.start(10)
+        self.tracking = True
+        self._traced_start = tracemalloc.get_traced_memory()[0]
+        self._baseline_snapshot = tracemalloc.take_snapshot()
+        print("Allocation tracking on")
+
+    def scene_report(self, scene):
+        stats = self.scenes[scene]
+        frames = stats.frames or 1
+        line = f"[memory] {scene}: {stats.frames} frames, {stats.blocks / frames:+.1f} blocks/frame"
+        if self.tracking:
+            line += f", {stats.bytes / frames / 1024:.1f} KiB allocated/frame"
+        return line
+
+    def write_snapshot_diff(self, path=None):
+        """Write the biggest allocation growth since tracking started; returns the path."""
+        if not self.tracking:
+            print("Allocation tracking is off - press F5 first")
+            return None
+        path = path or f"memdiff-{time.strftime('%Y%m%d-%H%M%S')}.txt"
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+        ])
+        stats = snapshot.compare_to(self._baseline_snapshot, "lineno")
+        with open(path, "w") as f:
+            for scene in self.scenes:
+                f.write(self.scene_report(scene) + "\n")
+            for t, rss in self.samples:
+                f.write(f"[rss] t={t / 1000:.0f}s {rss / (1024 * 1024):.1f} MB\n")
+            f.write(f"\nTop {SNAPSHOT_TOP} allocation sites by growth:\n")
+            for stat in stats[:SNAPSHOT_TOP]:
+                f.write(f"{stat}\n")
+        print(f"Wrote {path}")
+        return path
@@ -0,0 +1,165 @@
+"""
+Whole-genome minimap strip for the banner.
+
+When a puzzle starts, the genome is reduced to a pyramid of mip levels. Level 0
+has one bin per base and each level above halves the number of bins. With
+numpy each level is one reshape-and-reduce of the one below, so a new puzzle
+does not stall the frame; without it the levels are plain lists. The strip
+is rendered once from the coarsest level that still has at least one bin per
+pixel, and cached. Every frame only the cached strip and the read/viewport
+markers are blitted.
+
+Two colourings are available:
+- "composition": each bin blends the nucleotide colours by base counts.
+- "score": each bin shows the best ungapped match fraction of the puzzle's read
+  at any offset inside it.
+"""
+import pygame
+
+from perf_hud import allocations
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+MODES = ("composition", "score")
+SCORE_FALLBACK_LIMIT = 20_000  # Above this genome length, score mode needs numpy
+MARKER_COLOR = (255, 255, 255)
+VIEW_COLOR = (115, 194, 251)
+LOW_SCORE_COLOR = (40, 40, 40)
+HIGH_SCORE_COLOR = (0, 255, 0)
+
+
+def _halves(level, pad):
+    """The even and odd bins of level, padding an odd length with `pad`."""
+    if len(level) % 2:
+        level = np.append(level, pad)
+    return level[0::2], level[1::2]
+
+
+def composition_levels(genome_seq, letters="ATGC"):
+    """Mip levels of per-bin letter counts: levels[k][letter] is an array (or list) of counts."""
+    if np is not None:
+        genome = np.frombuffer(genome_seq.encode('ascii'), dtype=np.uint8)
+        level = {base: (genome == ord(base)).astype(np.int32) for base in letters}
+        levels = [level]
+        while len(next(iter(level.values()))) > 1:
+            level = {base: np.add(*_halves(counts, 0)) for base, counts in level.items()}
+            levels.append(level)
+        return levels
+    level = {base: [1 if c == base else 0 for c in genome_seq] for base in letters}
+    levels = [level]
+    while len(next(iter(level.values()))) > 1:
+        level = {base: [sum(counts[i:i + 2]) for i in range(0, len(counts), 2)]
+                 for base, counts in level.items()}
+        levels.append(level)
+    return levels
+
+
+def match_fractions(player_seq, genome_seq):
+    """Fraction of the read's bases matching the genome at each ungapped offset (an array with numpy)."""
+    read = player_seq.replace('-', '')
+    offsets = len(genome_seq) - len(read) + 1
+    if offsets <= 0:
+        return []
+    if np is not None:
+        genome = np.frombuffer(genome_seq.encode('ascii'), dtype=np.uint8)
+        matches = np.zeros(offsets, dtype=np.int32)
+        for j, base in enumerate(read.encode('ascii')):
+            matches += genome[j:j + offsets] == base
+        return matches / len(read)
+    if len(genome_seq) > SCORE_FALLBACK_LIMIT:
+        return None
+    return [sum(a == b for a, b in zip(read, genome_seq[pos:pos + len(read)])) / len(read)
+            for pos in range(offsets)]
+
+
+def score_levels(fractions):
+    """Mip levels keeping the best score in each bin."""
+    if np is not None:
+        level = np.asarray(fractions)
+        levels = [level]
+        while len(level) > 1:
+            level = np.maximum(*_halves(level, level[-1]))
+            levels.append(level)
+        return levels
+    levels = [fractions]
+    level = fractions
+    while len(level) > 1:
+        level = [max(level[i:i + 2]) for i in range(0, len(level), 2)]
+        levels.append(level)
+    return levels
+
+
+def blend(weights, colors):
+    total = sum(weights.values()) or 1
+    return tuple(int(sum(colors[base][channel] * count for base, count in weights.items()) / total)
+                 for channel in range(3))
+
+
+class GenomeMinimap:
+    def __init__(self, colors):
+        self.colors = colors
+        self.mode = "score"
+        self.genome_length = 0
+        self._levels = {}
+        self._cached = None
+        self._cache_key = None
+
+    def set_puzzle(self, genome_seq, player_seq):
+        """Precompute the mip levels for a new puzzle; the strip is re-rendered on next draw."""
+        self.genome_length = len(genome_seq)
+        letters = [letter for letter in self.colors if letter != '-']
+        self._levels = {"composition": composition_levels(genome_seq, letters)}
+        fractions = match_fractions(player_seq, genome_seq)
+        if fractions is not None and len(fractions):
+            self._levels["score"] = score_levels(fractions)
+        self._cached = None
+
+    def toggle_mode(self):
+        self.mode = MODES[(MODES.index(self.mode) + 1) % len(MODES)]
+        self._cached = None
+
+    def _render(self, size):
+        width, height = size
+        mode = self.mode if self.mode in self._levels else "composition"
+        levels = self._levels[mode]
+        # Coarsest level that still has at least one bin per pixel
+        level_index = 0
+        while level_index + 1 < len(levels) and self._bins(levels[level_index + 1], mode) >= width:
+            level_index += 1
+        level = levels[level_index]
+        bins = self._bins(level, mode)
+
+        strip = allocations.new_surface((bins, 1))
+        for i in range(bins):
+            if mode == "composition":
+                color = blend({base: counts[i] for base, counts in level.items()}, self.colors)
+            else:
+                t = min(1.0, max(0.0, (level[i] - 0.25) / 0.75))  # 25% is what chance gives
+                color = tuple(int(lo + (hi - lo) * t) for lo, hi in zip(LOW_SCORE_COLOR, HIGH_SCORE_COLOR))
+            strip.set_at((i, 0), color)
+        return allocations.scale(strip, (width, height))
+
+    @staticmethod
+    def _bins(level, mode):
+        return len(next(iter(level.values()))) if mode == "composition" else len(level)
+
+    def draw(self, surface, rect, alignment_start, read_length, view_start, view_end):
+        """Blit the cached strip into rect and mark the read and the visible rows."""
+        if not self.genome_length or rect.width <= 0:
+            return
+        key = (rect.size, self.mode)
+        if self._cached is None or self._cache_key != key:
+            self._cached = self._render(rect.size)
+            self._cache_key = key
+        surface.blit(self._cached, rect.topleft)
+
+        scale = rect.width / self.genome_length
+        view_rect = pygame.Rect(rect.x + int(view_start * scale), rect.y - 2,
+                                max(2, int((view_end - view_start) * scale)), rect.height + 4)
+        pygame.draw.rect(surface, VIEW_COLOR, view_rect, 1)
+        read_rect = pygame.Rect(rect.x + int(alignment_start * scale), rect.y,
+                                max(2, int(read_length * scale)), rect.height)
+        pygame.draw.rect(surface, MARKER_COLOR, read_rect, 2)
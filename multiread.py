@@ -0,0 +1,117 @@
+"""
+Multi-read puzzles: several reads placed on the same genome at once.
+
+ReadSet holds the reads of one puzzle, each with its own gaps and
+alignment_start. The game edits one of them at a time (the active read) with
+the usual controls and switches with Tab, so the rest of the game loop only
+ever sees a single player_seq/alignment_start pair.
+
+score_reads() scores every read in one batched numpy operation: the reads are
+stacked into a padded 2D array of character codes, each row is paired with the
+genome columns under its own offset, and a single lookup in the scoring
+model's dense table gives all the pair scores. Gap opening and extension
+costs come from comparing the gap mask with itself shifted by one column. The
+totals match calculate_score() for every read. Without numpy it falls back to
+one calculate_score() call per read.
+"""
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import alignment
+
+GAP = ord('-')
+
+
+def score_reads(player_seqs, genome_seq, starts, model=None):
+    """calculate_score() of each read at its own start, as a list, in one array operation."""
+    model = model or alignment.scoring_model
+    if np is None or not player_seqs:
+        return [alignment.calculate_score(p, genome_seq, s, model) for p, s in zip(player_seqs, starts)]
+    width = max(len(p) for p in player_seqs)
+    codes = np.zeros((len(player_seqs), width), dtype=np.uint8)  # 0 pads the shorter reads
+    for row, player_seq in enumerate(player_seqs):
+        codes[row, :len(player_seq)] = np.frombuffer(player_seq.encode("ascii"), dtype=np.uint8)
+    lengths = np.array([len(p) for p in player_seqs])
+    starts = np.asarray(starts)
+    genome_codes = np.frombuffer(genome_seq.encode("ascii"), dtype=np.uint8)
+
+    # Genome character under every read column (clipped; out-of-bounds reads are -inf anyway)
+    columns = np.clip(starts[:, None] + np.arange(width), 0, max(0, len(genome_seq) - 1))
+    under = genome_codes[columns] if len(genome_codes) else np.zeros_like(codes)
+    is_gap = codes == GAP
+    is_base = (codes != 0) & ~is_gap
+
+    table = model.dense()
+    totals = np.where(is_base, table[codes, under], 0).sum(axis=1)
+
+    charged = is_gap
+    if model.end_gaps_free:
+        # Only gaps with a read base on both sides cost anything
+        before = np.logical_or.accumulate(is_base, axis=1)
+        after = np.logical_or.accumulate(is_base[:, ::-1], axis=1)[:, ::-1]
+        charged = is_gap & before & after
+    follows_gap = np.zeros_like(is_gap)
+    follows_gap[:, 1:] = charged[:, :-1]
+    totals = (totals + (charged & ~follows_gap).sum(axis=1) * model.gap_opening
+              + (charged & follows_gap).sum(axis=1) * model.gap_extension)
+
+    scores = totals.tolist()
+    for row, fits in enumerate((starts + lengths <= len(genome_seq)).tolist()):
+        if not fits:
+            scores[row] = float('-inf')
+    return scores
+
+
+class ReadSet:
+    def __init__(self, count):
+        self.count = count
+        self.genome_seq = None
+        self.reads = []
+        self.starts = []
+        self.active = 0
+        self.max_score = None   # Sum of the reads' optimal scores, None if not solved
+        self._scores = None
+
+    def new_puzzle(self, genome_seq, reads, max_score=None):
+        """
+        Start a puzzle from its reads (made and solved by the puzzle pool). The
+        reads start spread out along the genome so they do not all sit on top
+        of each other.
+        """
+        self.genome_seq = genome_seq
+        self.reads = list(reads)
+        self.count = len(self.reads)
+        spacing = len(genome_seq) // self.count
+        self.starts = [0] + [max(0, min(i * spacing, len(genome_seq) - len(read)))
+                             for i, read in enumerate(self.reads[1:], 1)]
+        self.active = 0
+        self._scores = None
+        self.max_score = max_score
+
+    def store(self, player_seq, alignment_start):
+        """Record the game's current read and offset as the active read's."""
+        if (player_seq != self.reads[self.active]
+                or alignment_start != self.starts[self.active]):
+            self.reads[self.active] = player_seq
+            self.starts[self.active] = alignment_start
+            self._scores = None
+
+    def select(self, index):
+        """Make read `index` active; returns its (player_seq, alignment_start)."""
+        self.active = index % self.count
+        return self.reads[self.active], self.starts[self.active]
+
+    def inactive(self):
+        """(player_seq, alignment_start) of every read but the active one, in order."""
+        return [(read, start) for i, (read, start) in enumerate(zip(self.reads, self.starts))
+                if i != self.active]
+
+    def scores(self):
+        if self._scores is None:
+            self._scores = score_reads(self.reads, self.genome_seq, self.starts)
+        return self._scores
+
+    def total_score(self):
+        return sum(self.scores())
@@ -0,0 +1,278 @@
+"""
+2-bit packed nucleotide sequences with word-parallel match counting.
+
+A sequence is stored as numpy uint64 words holding 32 bases each (A=0, C=1,
+G=2, T=3, base i of a word in bits 2i..2i+1), so a genome takes a quarter of
+the memory of the str. Positions that are not A/C/G/T are tracked in a
+separate mask, and gaps ('-') in a third, so pack()/unpack() round-trip the
+strings the game uses. Both masks are None when there is nothing to mark,
+which is the usual case for genomes.
+
+Comparing a read with the genome at an offset is an XOR of the words. A base
+differs where either bit of its pair is set, and a popcount of the matching
+pairs gives the match count 32 bases at a time. match_counts() does this for
+every offset at once: one pass per sub-word shift (0..31 bases), with each
+pass vectorised over all word offsets.
+
+numpy is required; without it np is None and callers should keep to the
+str-based engine.
+"""
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import alignment
+
+BASES_PER_WORD = 32
+CODE_BASES = "ACGT"
+
+if np is not None:
+    LOW_BITS = np.uint64(0x5555555555555555)  # Bit 0 of every base's pair
+    BASE_CODES = np.full(256, 4, dtype=np.uint8)
+    for code, base in enumerate(b"ACGT"):
+        BASE_CODES[base] = code
+        BASE_CODES[base + 32] = code  # lower case
+    SLOT_SHIFTS = (2 * np.arange(BASES_PER_WORD)).astype(np.uint64)
+    if hasattr(np, "bitwise_count"):
+        popcount = np.bitwise_count
+    else:
+        POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+        def popcount(words):
+            counts = POPCOUNT_TABLE[words.view(np.uint8)]
+            return counts.reshape(words.shape + (8,)).sum(axis=-1)
+
+
+class PackedSequence:
+    __slots__ = ("length", "words", "mask", "gaps")
+
+    def __init__(self, length, words, mask=None, gaps=None):
+        self.length = length
+        self.words = words    # uint64, 32 bases per word
+        self.mask = mask      # uint64 with bit 0 of a pair set where the base is A/C/G/T, or None if all are
+        self.gaps = gaps      # same layout, set where the str had '-', or None if there were none
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.words, self.mask, self.gaps) if a is not None)
+
+    def valid_mask(self):
+        """Mask of the A/C/G/T positions, with the padding in the last word cleared."""
+        if self.mask is not None:
+            return self.mask
+        return _slot_bits(np.ones(self.length, dtype=bool), len(self.words))
+
+    def unpack(self):
+        """Convert back to a str; gaps become '-' and other non-ACGT positions 'N'."""
+        codes = ((self.words[:, None] >> SLOT_SHIFTS) & np.uint64(3)).astype(np.uint8).ravel()
+        chars = np.frombuffer(CODE_BASES.encode("ascii"), dtype=np.uint8)[codes[:self.length]]
+        if self.mask is not None:
+            chars[~_slot_flags(self.mask, self.length)] = ord("N")
+        if self.gaps is not None:
+            chars[_slot_flags(self.gaps, self.length)] = ord("-")
+        return chars.tobytes().decode("ascii")
+
+
+def _slot_bits(flags, nwords):
+    """Pack a bool array into bit 0 of each base's pair."""
+    padded = np.zeros(nwords * BASES_PER_WORD, dtype=np.uint64)
+    padded[:len(flags)] = flags
+    return np.bitwise_or.reduce(padded.reshape(nwords, BASES_PER_WORD) << SLOT_SHIFTS, axis=1)
+
+
+def _slot_flags(bits, length):
+    return ((bits[:, None] >> SLOT_SHIFTS) & np.uint64(1)).astype(bool).ravel()[:length]
+
+
+def pack(seq):
+    """Pack a str of bases (with optional '-' gaps) into a PackedSequence."""
+    raw = np.frombuffer(seq.encode("ascii"), dtype=np.uint8)
+    values = BASE_CODES[raw]
+    nwords = max(1, -(-len(seq) // BASES_PER_WORD))
+    padded = np.zeros(nwords * BASES_PER_WORD, dtype=np.uint64)
+    padded[:len(seq)] = values & 3
+    words = np.bitwise_or.reduce(padded.reshape(nwords, BASES_PER_WORD) << SLOT_SHIFTS, axis=1)
+    valid = values != 4
+    mask = None if valid.all() else _slot_bits(valid, nwords)
+    is_gap = raw == ord("-")
+    gaps = _slot_bits(is_gap, nwords) if is_gap.any() else None
+    return PackedSequence(len(seq), words, mask, gaps)
+
+
+def unpack(packed):
+    return packed.unpack()
+
+
+def _shifted(words, shift):
+    """words viewed `shift` bases further along: result[i] holds bases 32*i+shift onwards."""
+    if shift == 0:
+        return words
+    bits = np.uint64(2 * shift)
+    result = words >> bits
+    result[:-1] |= words[1:] << (np.uint64(64) - bits)
+    return result
+
+
+def match_counts(read, genome):
+    """
+    Number of read bases equal to the genome base they sit on, for every offset
+    0..genome.length - read.length. Gaps and non-ACGT positions never match.
+    """
+    return match_counts_multi([read], genome)[0]
+
+
+def match_counts_multi(reads, genome):
+    """
+    match_counts() for several reads in one pass: each sub-word shift of the
+    genome is computed once, and all reads are compared against it in a single
+    broadcast XOR/popcount per read word. Shorter reads are padded with
+    masked-out words.
+    """
+    results = [np.zeros(0, dtype=np.int32)] * len(reads)
+    live = [k for k, read in enumerate(reads) if genome.length - read.length + 1 > 0]
+    if not live:
+        return results
+    longest_offsets = max(genome.length - reads[k].length + 1 for k in live)
+    nread = max(len(reads[k].words) for k in live)
+    words = np.zeros((len(live), nread), dtype=np.uint64)
+    masks = np.zeros((len(live), nread), dtype=np.uint64)
+    for row, k in enumerate(live):
+        words[row, :len(reads[k].words)] = reads[k].words
+        masks[row, :len(reads[k].words)] = reads[k].valid_mask()
+    # Pad the genome so every offset can read whole words for the longest read
+    word_offsets = -(-longest_offsets // BASES_PER_WORD)
+    pad = word_offsets + nread + 1 - len(genome.words)
+    genome_words = np.concatenate((genome.words, np.zeros(max(0, pad), dtype=np.uint64)))
+    genome_mask = genome.mask
+    if genome_mask is not None:
+        genome_mask = np.concatenate((genome_mask, np.zeros(max(0, pad), dtype=np.uint64)))
+
+    # Offset 32*i + shift is counted in shift_counts[:, i], then written to counts[:, 32*i + shift]
+    counts = np.empty((len(live), word_offsets * BASES_PER_WORD), dtype=np.int32)
+    shift_counts = np.empty((len(live), word_offsets), dtype=np.int32)
+    for shift in range(BASES_PER_WORD):
+        g = _shifted(genome_words, shift)
+        m = _shifted(genome_mask, shift) if genome_mask is not None else None
+        shift_counts.fill(0)
+        for j in range(nread):
+            x = words[:, j, None] ^ g[None, j:j + word_offsets]
+            same = ~(x | (x >> np.uint64(1))) & masks[:, j, None]
+            if m is not None:
+                same &= m[None, j:j + word_offsets]
+            shift_counts += popcount(same)
+        counts[:, shift::BASES_PER_WORD] = shift_counts
+    for row, k in enumerate(live):
+        results[k] = counts[row, :genome.length - reads[k].length + 1]
+    return results
+
+
+def gap_penalty(player_seq, model=None):
+    """Score contribution of the gaps in player_seq, which does not depend on the offset."""
+    model = model or alignment.scoring_model
+    if model.end_gaps_free:
+        player_seq = player_seq.strip('-')
+    penalty = 0
+    gap_open = False
+    for base in player_seq:
+        if base == '-':
+            penalty += model.gap_extension if gap_open else model.gap_opening
+            gap_open = True
+        else:
+            gap_open = False
+    return penalty
+
+
+def score_all_offsets(player_seq, genome):
+    """
+    calculate_score() at every offset, as an array; genome may be a str or PackedSequence.
+    Match counting only captures match/mismatch scoring; other scoring models
+    (substitution matrices, BLOSUM62) add one row of the model's dense table
+    per read letter instead, still vectorised over every offset.
+    """
+    model = alignment.scoring_model
+    if not model.uniform:
+        genome_seq = genome.unpack() if isinstance(genome, PackedSequence) else genome
+        return matrix_scores(player_seq, genome_seq, model)
+    if not isinstance(genome, PackedSequence):
+        genome = pack(genome)
+    matches = match_counts(pack(player_seq), genome)
+    bases = len(player_seq) - player_seq.count('-')
+    return (gap_penalty(player_seq, model) + matches * model.match
+            + (bases - matches) * model.mismatch)
+
+
+def score_both_strands(player_seq, genome):
+    """
+    score_all_offsets() for the read and its reverse complement, sharing the
+    genome's encoding and each of its shifts between the two strands.
+    Returns (forward_scores, reverse_scores).
+    """
+    model = alignment.scoring_model
+    reverse_seq = alignment.reverse_complement(player_seq)
+    if not model.uniform:
+        genome_seq = genome.unpack() if isinstance(genome, PackedSequence) else genome
+        return matrix_scores(player_seq, genome_seq, model), matrix_scores(reverse_seq, genome_seq, model)
+    if not isinstance(genome, PackedSequence):
+        genome = pack(genome)
+    forward, reverse = match_counts_multi([pack(player_seq), pack(reverse_seq)], genome)
+    bases = len(player_seq) - player_seq.count('-')
+    return tuple(gap_penalty(seq, model) + matches * model.match + (bases - matches) * model.mismatch
+                 for seq, matches in ((player_seq, forward), (reverse_seq, reverse)))
+
+
+def matrix_scores(player_seq, genome_seq, model):
+    """calculate_score() at every offset via the model's 256x256 table."""
+    offsets = len(genome_seq) - len(player_seq) + 1
+    if offsets <= 0:
+        return np.zeros(0, dtype=np.int64)
+    table = model.dense()
+    genome_codes = np.frombuffer(genome_seq.encode("ascii"), dtype=np.uint8)
+    scores = np.full(offsets, gap_penalty(player_seq, model), dtype=table.dtype)
+    for j, letter in enumerate(player_seq):
+        if letter != '-':
+            scores += table[ord(letter)][genome_codes[j:j + offsets]]
+    return scores
+
+
+_cached_genome = (None, None)
+
+
+def find_optimal_position(player_seq, genome_seq):
+    """Drop-in replacement for alignment.find_optimal_position() using packed comparison."""
+    global _cached_genome
+    positions = len(genome_seq) - (len(player_seq) + 4) + 1
+    if positions <= 0:
+        return 0, float('-inf')
+    if alignment.scoring_model.uniform:
+        if _cached_genome[0] is not genome_seq:
+            _cached_genome = (genome_seq, pack(genome_seq))
+        scores = score_all_offsets(player_seq, _cached_genome[1])[:positions]
+    else:
+        # Matrix models score the str directly; packing only keeps A/C/G/T
+        scores = matrix_scores(player_seq, genome_seq, alignment.scoring_model)[:positions]
+    best_position = int(np.argmax(scores))
+    return best_position, scores[best_position].item()
+
+
+def find_optimal_position_both_strands(player_seq, genome_seq):
+    """
+    Like find_optimal_position(), but the read may also sit on the minus strand.
+    Returns (position, score, strand) with strand '+' or '-'; for '-' the position
+    is where the reverse complement of the read goes.
+    """
+    global _cached_genome
+    positions = len(genome_seq) - (len(player_seq) + 4) + 1
+    if positions <= 0:
+        return 0, float('-inf'), '+'
+    if alignment.scoring_model.uniform:
+        if _cached_genome[0] is not genome_seq:
+            _cached_genome = (genome_seq, pack(genome_seq))
+        genome = _cached_genome[1]
+    else:
+        genome = genome_seq
+    forward, reverse = (scores[:positions] for scores in score_both_strands(player_seq, genome))
+    best_forward, best_reverse = int(np.argmax(forward)), int(np.argmax(reverse))
+    if forward[best_forward] >= reverse[best_reverse]:
+        return best_forward, forward[best_forward].item(), '+'
+    return best_reverse, reverse[best_reverse].item(), '-'
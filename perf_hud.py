@@ -0,0 +1,190 @@
+"""
+Performance overlay for diagnosing stutter on the kiosks.
+
+The game loop calls begin_frame() once per frame and mark(stage) after each
+stage; mark() only reads the clock and adds to a dict, so leaving the calls in
+costs next to nothing while the overlay is hidden. The overlay itself is
+re-rendered a few times a second into a cached surface and just blitted on the
+other frames.
+"""
+import time
+from collections import deque
+
+import pygame
+
+from tracing import tracer
+
+HUD_REFRESH_MS = 250  # How often the cached overlay surface is redrawn
+HISTOGRAM_BINS = [(0, 8), (8, 17), (17, 33), (33, 50), (50, 100), (100, None)]  # ms
+HUD_BACKGROUND = (0, 0, 0, 180)
+HUD_TEXT = (255, 255, 255)
+HUD_BAR = (115, 194, 251)
+HUD_SLOW_BAR = (178, 34, 34)
+
+
+class SurfaceCounter:
+    """
+    Counts the Surfaces (including text renders and scaled copies) and fonts
+    the game creates while drawing. The drawing code makes them through the
+    wrappers below on the shared `allocations` counter, so each count comes
+    from the allocation itself and nothing in pygame is patched. Surfaces made
+    without the wrappers are not counted.
+    """
+
+    def __init__(self):
+        self.surfaces = 0
+        self.fonts = 0
+
+    def new_surface(self, size, *args):
+        self.surfaces += 1
+        return pygame.Surface(size, *args)
+
+    def render(self, font, text, color):
+        self.surfaces += 1
+        return font.render(text, True, color)
+
+    def scale(self, surface, size):
+        self.surfaces += 1
+        return pygame.transform.scale(surface, size)
+
+    def smoothscale(self, surface, size):
+        self.surfaces += 1
+        return pygame.transform.smoothscale(surface, size)
+
+    def copy(self, surface):
+        self.surfaces += 1
+        return surface.copy()
+
+    def sys_font(self, name, size):
+        self.fonts += 1
+        return pygame.font.SysFont(name, size)
+
+    def take(self):
+        """Return (surfaces, fonts) created since the last call and reset the counts."""
+        counts = (self.surfaces, self.fonts)
+        self.surfaces = 0
+        self.fonts = 0
+        return counts
+
+
+allocations = SurfaceCounter()
+
+
+class PerfHUD:
+    def __init__(self, history=240):
+        self.visible = False
+        self.frame_times = deque(maxlen=history)     # ms
+        self.surface_counts = deque(maxlen=history)
+        self.font_counts = deque(maxlen=history)
+        self.block_counts = deque(maxlen=history)    # net Python blocks allocated per frame
+        self.byte_counts = deque(maxlen=history)     # bytes allocated per frame, while tracemalloc runs
+        self.stage_times = {}                        # stage -> ms in the current frame
+        self.stage_history = {}                      # stage -> deque of ms per frame
+        self.counter = allocations
+        self._history = history
+        self._frame_start = None
+        self._last_mark = None
+        self._cached_surface = None
+        self._last_render = 0
+        self._font = None
+
+    def toggle(self):
+        self.visible = not self.visible
+        if not self.visible:
+            self._cached_surface = None
+        self.counter.take()
+
+    def begin_frame(self):
+        """Close out the previous frame and start timing a new one."""
+        now = time.perf_counter()
+        if self._frame_start is not None:
+            self.frame_times.append((now - self._frame_start) * 1000)
+            for stage, ms in self.stage_times.items():
+                if stage not in self.stage_history:
+                    self.stage_history[stage] = deque(maxlen=self._history)
+                self.stage_history[stage].append(ms)
+            surfaces, fonts = self.counter.take()
+            self.surface_counts.append(surfaces)
+            self.font_counts.append(fonts)
+        self.stage_times = {}
+        self._frame_start = now
+        self._last_mark = now
+
+    def record_memory(self, blocks, allocated_bytes=None):
+        """Add a frame's allocations (from MemoryMonitor); allocated_bytes is None when not tracking."""
+        self.block_counts.append(blocks)
+        if allocated_bytes is None:
+            self.byte_counts.clear()
+        else:
+            self.byte_counts.append(allocated_bytes)
+
+    def mark(self, stage):
+        """
+        Charge the time since the previous mark (or frame start) to stage.
+        The stage is also recorded as a span when a trace capture is running.
+        """
+        now = time.perf_counter()
+        self.stage_times[stage] = self.stage_times.get(stage, 0) + (now - self._last_mark) * 1000
+        tracer.add(stage, self._last_mark, now)
+        self._last_mark = now
+
+    def draw(self, surface, current_time):
+        if not self.visible:
+            return
+        if self._cached_surface is None or current_time - self._last_render >= HUD_REFRESH_MS:
+            self._cached_surface = self._render()
+            self._last_render = current_time
+        surface.blit(self._cached_surface, (10, 90))
+
+    def _render(self):
+        # The overlay's own surfaces are not reported, so they don't show up in the counts
+        if self._font is None:
+            self._font = pygame.font.SysFont('Consolas', 16)
+
+        lines = []
+        if self.frame_times:
+            avg = sum(self.frame_times) / len(self.frame_times)
+            worst = max(self.frame_times)
+            lines.append(f"FPS {1000 / avg:5.1f}   avg {avg:5.1f} ms   worst {worst:5.1f} ms")
+        else:
+            lines.append("FPS   --")
+        for stage, samples in self.stage_history.items():
+            lines.append(f"{stage:<16}{sum(samples) / len(samples):7.2f} ms   max {max(samples):6.2f}")
+        if self.surface_counts:
+            n = len(self.surface_counts)
+            lines.append(f"surfaces/frame {sum(self.surface_counts) / n:6.1f}   "
+                         f"fonts/frame {sum(self.font_counts) / n:4.1f}")
+        if self.block_counts:
+            line = f"blocks/frame {sum(self.block_counts) / len(self.block_counts):+7.1f}"
+            if self.byte_counts:
+                line += f"   KiB/frame {sum(self.byte_counts) / len(self.byte_counts) / 1024:6.1f}"
+            lines.append(line)
+
+        line_height = self._font.get_linesize()
+        histogram_height = 60
+        width = 380
+        height = line_height * (len(lines) + 1) + histogram_height + 20
+        hud = pygame.Surface((width, height), pygame.SRCALPHA)
+        hud.fill(HUD_BACKGROUND)
+        for i, line in enumerate(lines):
+            hud.blit(self._font.render(line, True, HUD_TEXT), (8, 6 + i * line_height))
+
+        # Frame-time histogram
+        counts = [0] * len(HISTOGRAM_BINS)
+        for ms in self.frame_times:
+            for i, (low, high) in enumerate(HISTOGRAM_BINS):
+                if high is None or ms < high:
+                    counts[i] += 1
+                    break
+        top = 10 + len(lines) * line_height
+        bar_width = (width - 16) / len(HISTOGRAM_BINS)
+        most = max(counts) or 1
+        for i, ((low, high), count) in enumerate(zip(HISTOGRAM_BINS, counts)):
+            bar_height = int(histogram_height * count / most)
+            color = HUD_BAR if high is not None and high <= 17 else HUD_SLOW_BAR
+            pygame.draw.rect(hud, color, (8 + i * bar_width, top + histogram_height - bar_height,
+                                          bar_width - 4, bar_height))
+            label = f"{low}+" if high is None else f"<{high}"
+            hud.blit(self._font.render(label, True, HUD_TEXT), (8 + i * bar_width, top + histogram_height + 2))
+
+        return hud
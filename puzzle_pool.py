@@ -0,0 +1,171 @@
+"""
+Pool of ready-to-play puzzles so "Play Again" never waits on generation.
+
+Each puzzle is generated together with its solution record (the validator's
+optimal placement, gapped read and score breakdown), so hints and "% of
+optimal" never search during a frame (genomes over SOLVE_LIMIT are left to the
+background hint search instead). Ambiguous puzzles and those outside the
+target score range are regenerated. A background thread keeps the pool topped
+up, and starting a game just pops the next puzzle off a deque. Where threads
+are unavailable (the web build), a puzzle is generated inline when the pool is
+empty.
+
+Every puzzle comes from an explicit seed: generate(seed) must build the same
+puzzle from the same seed, so a seed shown on the results screen can be played
+again (get(seed)), and the daily challenge is just the seed of the day. A
+puzzle that cannot be rebuilt from its seed (a sampled FASTQ read) is returned
+with seed None instead, so it is never shown or cached under a seed. Solved
+puzzles are kept in a small cache keyed by seed, so a repeated seed costs
+nothing to set up.
+
+For multi-read puzzles the pool also cuts the extra reads from the genome and
+solves them, so starting a game never runs the validator on the UI thread.
+
+Puzzles are solved on the refill thread itself. With numpy the validator's
+dynamic program is one array step per read base (about 20 ms for a 5000-base
+genome on both strands), so it holds the GIL only briefly. A worker process
+would re-import main.py under the spawn start method and open a second
+window, and the web build has no processes at all.
+"""
+import datetime
+import random
+import threading
+from collections import OrderedDict, deque
+
+from alignment import reverse_complement
+from validator import validate_puzzle, optimal_alignment
+
+POOL_SIZE = 8
+SOLVE_LIMIT = 5_000  # Longer genomes are not solved up front (the validator is O(read x genome))
+MAX_ATTEMPTS = 20  # Give up on the target range rather than stall the pool
+# Real reads never need gaps, so "no_gaps_needed" alone does not reject a puzzle
+REJECT_TAGS = frozenset(("ambiguous", "score_low", "score_high"))
+SEED_LIMIT = 1_000_000_000  # Seeds are short enough to read off the screen
+CACHE_SIZE = 64  # Puzzles kept by seed (only those small enough to be solved up front)
+
+
+def new_seed():
+    return random.randrange(SEED_LIMIT)
+
+
+def daily_seed(day=None):
+    """The seed every kiosk plays on `day` (default today), e.g. 20261019."""
+    day = day or datetime.date.today()
+    return int(day.strftime("%Y%m%d"))
+
+
+class Puzzle:
+    __slots__ = ("genome_seq", "player_seq", "optimal_position", "max_score", "report", "seed",
+                 "extra_reads", "extra_max_score")
+
+    def __init__(self, genome_seq, player_seq, optimal_position, max_score, report=None, seed=None,
+                 extra_reads=(), extra_max_score=None):
+        self.genome_seq = genome_seq
+        self.player_seq = player_seq
+        self.optimal_position = optimal_position
+        self.max_score = max_score
+        self.report = report            # validator.PuzzleReport: the true optimum and tags
+        self.seed = seed                # None when the puzzle cannot be rebuilt from a seed
+        self.extra_reads = extra_reads  # The other reads of a multi-read puzzle
+        self.extra_max_score = extra_max_score  # Sum of their optimal scores, None if not solved
+
+
+def best_score(read, genome_seq, both_strands=False):
+    """The read's optimal score, on whichever strand the player can flip it to when both_strands."""
+    score = optimal_alignment(read, genome_seq)[0]
+    if both_strands:
+        score = max(score, optimal_alignment(reverse_complement(read), genome_seq)[0])
+    return score
+
+
+def solve_puzzle(genome_seq, player_seq, min_score=None, max_score=None, both_strands=False, seed=None,
+                 extra_reads=()):
+    extra_reads = tuple(extra_reads)
+    if len(genome_seq) > SOLVE_LIMIT:
+        # The hint searches on demand
+        return Puzzle(genome_seq, player_seq, None, None, seed=seed, extra_reads=extra_reads)
+    report = validate_puzzle(genome_seq, player_seq, min_score, max_score,
+                             both_strands=both_strands)
+    extra_max_score = sum(best_score(read, genome_seq, both_strands) for read in extra_reads)
+    return Puzzle(genome_seq, player_seq, report.optimal_start, report.optimal_score, report, seed,
+                  extra_reads, extra_max_score)
+
+
+class PuzzlePool:
+    def __init__(self, generate, size=POOL_SIZE, min_score=None, max_score=None, both_strands=False,
+                 extra_reads=0, make_read=None):
+        self.generate = generate        # (seed) -> (genome_seq, player_seq, seed or None)
+        self.extra_reads = extra_reads  # Reads per puzzle beyond the first (multi-read mode)
+        self.make_read = make_read      # (genome_seq, rng) -> player_seq, for the extra reads
+        self.size = size
+        self.min_score = min_score
+        self.max_score = max_score
+        self.both_strands = both_strands  # Reads may come from the minus strand
+        self.rejected = 0
+        self.pool = deque()
+        self.cache = OrderedDict()      # seed -> Puzzle, least recently used first
+        self._cache_lock = threading.Lock()
+        self._wanted = threading.Event()
+        self._thread = None
+
+    def make(self):
+        """A new puzzle from a fresh random seed, retrying with new seeds if it is rejected."""
+        for _ in range(MAX_ATTEMPTS):
+            puzzle = self.solve(new_seed())
+            if puzzle.report is None or REJECT_TAGS.isdisjoint(puzzle.report.tags):
+                break
+            self.rejected += 1
+        self._remember(puzzle)
+        return puzzle
+
+    def solve(self, seed):
+        genome_seq, player_seq, seed = self.generate(seed)
+        extra_reads = ()
+        if self.extra_reads:
+            # From the seed too, so a replayed seed has the same reads
+            rng = random.Random(f"{seed}-reads") if seed is not None else random.Random()
+            extra_reads = [self.make_read(genome_seq, rng) for _ in range(self.extra_reads)]
+        return solve_puzzle(genome_seq, player_seq, self.min_score, self.max_score, self.both_strands, seed,
+                            extra_reads)
+
+    def get(self, seed):
+        """The puzzle for `seed`, from the cache when it was played or generated before."""
+        with self._cache_lock:
+            puzzle = self.cache.get(seed)
+            if puzzle is not None:
+                self.cache.move_to_end(seed)
+                return puzzle
+        puzzle = self.solve(seed)  # Whatever the seed gives, even if make() would reject it
+        self._remember(puzzle)
+        return puzzle
+
+    def _remember(self, puzzle):
+        if puzzle.seed is None or puzzle.report is None:
+            return  # Not reproducible, or too large to keep around
+        with self._cache_lock:
+            self.cache[puzzle.seed] = puzzle
+            self.cache.move_to_end(puzzle.seed)
+            while len(self.cache) > CACHE_SIZE:
+                self.cache.popitem(last=False)
+
+    def start(self):
+        """Start the background refill thread; without threads, puzzles are made on demand."""
+        try:
+            self._thread = threading.Thread(target=self._worker, daemon=True)
+            self._thread.start()
+        except RuntimeError:
+            self._thread = None
+        self._wanted.set()
+
+    def _worker(self):
+        while True:
+            self._wanted.wait()
+            self._wanted.clear()
+            while len(self.pool) < self.size:
+                self.pool.append(self.make())
+
+    def next(self):
+        """Return the next puzzle in O(1), generating one inline only if the pool ran dry."""
+        puzzle = self.pool.popleft() if self.pool else self.make()
+        self._wanted.set()
+        return puzzle
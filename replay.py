@@ -0,0 +1,152 @@
+"""
+Recorded games, replayed as a "ghost" racing the player on the same seed.
+
+A replay is the list of changes the player made to the read, each stamped with
+the game time:
+
+    (time_ms, op, arg)
+
+op is edit_log's INSERT_GAP / DELETE_GAP / FLIP (arg is the read index) or
+MOVE (arg is the change in alignment_start). ReplayRecorder builds the list by
+diffing the read once per frame, so undo/redo, key repeat and controller input
+need no hooks of their own.
+
+encode() packs the list into a short ASCII string for the leaderboard row:
+times are stored as deltas from the previous action in TIME_STEP_MS units, and
+every number is a varint (args zigzag-encoded, sharing a varint with the op),
+so an action usually takes two bytes and a game a few hundred.
+"""
+import base64
+import os
+
+from edit_log import INSERT_GAP, DELETE_GAP, FLIP, apply_edit
+from alignment import calculate_score, reverse_complement
+
+MOVE = 3
+TIME_STEP_MS = 10
+
+
+def _write_varint(out, n):
+    while n >= 0x80:
+        out.append(n & 0x7F | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _read_varint(data, i):
+    n = shift = 0
+    while True:
+        byte = data[i]
+        i += 1
+        n |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return n, i
+        shift += 7
+
+
+def encode(actions):
+    out = bytearray()
+    last = 0
+    for time_ms, op, arg in actions:
+        ticks = time_ms // TIME_STEP_MS
+        _write_varint(out, ticks - last)
+        _write_varint(out, ((arg << 1 if arg >= 0 else (-arg << 1) - 1) << 2) | op)
+        last = ticks
+    return base64.b64encode(bytes(out)).decode("ascii")
+
+
+def decode(text):
+    data = base64.b64decode(text)
+    actions = []
+    i = ticks = 0
+    while i < len(data):
+        delta, i = _read_varint(data, i)
+        packed, i = _read_varint(data, i)
+        ticks += delta
+        zigzag = packed >> 2
+        arg = zigzag >> 1 if not zigzag & 1 else -((zigzag + 1) >> 1)
+        actions.append((ticks * TIME_STEP_MS, packed & 3, arg))
+    return actions
+
+
+def diff_edits(old, new):
+    """
+    Gap edits turning read `old` into `new`, as (op, index) pairs applied in
+    order. Only gaps differ between the two, unless the read was flipped.
+    """
+    if old.replace('-', '') != new.replace('-', ''):
+        return [(FLIP, 0)] + diff_edits(reverse_complement(old), new)
+    prefix = len(os.path.commonprefix((old, new)))
+    suffix = len(os.path.commonprefix((old[prefix:][::-1], new[prefix:][::-1])))
+    old_middle = old[prefix:len(old) - suffix]
+    new_middle = new[prefix:len(new) - suffix]
+    edits = []
+    # Drop the middle's old gaps (right to left keeps the indices valid), then add the new ones
+    for i in range(len(old_middle) - 1, -1, -1):
+        if old_middle[i] == '-':
+            edits.append((DELETE_GAP, prefix + i))
+    for i, base in enumerate(new_middle):
+        if base == '-':
+            edits.append((INSERT_GAP, prefix + i))
+    return edits
+
+
+class ReplayRecorder:
+    def __init__(self):
+        self.actions = []
+        self._player_seq = ''
+        self._alignment_start = 0
+
+    def start(self, player_seq, alignment_start):
+        """Start a fresh recording from the puzzle's starting read."""
+        self.actions = []
+        self._player_seq = player_seq
+        self._alignment_start = alignment_start
+
+    def record(self, player_seq, alignment_start, time_ms):
+        """Log whatever changed since the last call."""
+        if player_seq != self._player_seq:
+            for op, index in diff_edits(self._player_seq, player_seq):
+                self.actions.append((time_ms, op, index))
+            self._player_seq = player_seq
+        if alignment_start != self._alignment_start:
+            self.actions.append((time_ms, MOVE, alignment_start - self._alignment_start))
+            self._alignment_start = alignment_start
+
+    def encode(self):
+        return encode(self.actions)
+
+
+class Ghost:
+    """A recorded game played back against the clock."""
+
+    def __init__(self, replay, genome_seq, player_seq, name=""):
+        self.actions = decode(replay)
+        self.name = name
+        self.genome_seq = genome_seq
+        self.player_seq = player_seq
+        self.alignment_start = 0
+        self._next = 0
+        self._score = None
+
+    def advance(self, time_ms):
+        """Apply every action up to time_ms; cheap when there is nothing new."""
+        while self._next < len(self.actions) and self.actions[self._next][0] <= time_ms:
+            _, op, arg = self.actions[self._next]
+            if op == MOVE:
+                self.alignment_start += arg
+            else:
+                self.player_seq = apply_edit(self.player_seq, op, arg)
+            self._next += 1
+            self._score = None
+
+    @property
+    def score(self):
+        """The ghost's current score, rescored only after it changed."""
+        if self._score is None:
+            self._score = calculate_score(self.player_seq, self.genome_seq, self.alignment_start)
+        return self._score
+
+    @property
+    def finished(self):
+        return self._next >= len(self.actions)
@@ -0,0 +1,167 @@
+"""
+Scoring models: substitution scores and gap costs, compiled to lookup tables.
+
+A model is described by a small dict (a built-in preset or a JSON file):
+
+    {
+        "name": "transitions",
+        "match": 1,
+        "mismatch": -1,          # used for any pair not covered below
+        "transition": -1,        # A<->G, C<->T (optional)
+        "transversion": -2,      # purine <-> pyrimidine (optional)
+        "matrix": {"AC": -2},    # explicit pair scores, applied both ways (optional)
+        "gap_opening": -2,
+        "gap_extension": -1,
+        "iupac": false,          # score IUPAC ambiguity codes as the mean over their bases
+        "end_gaps_free": false,  # gaps before the first / after the last read base cost nothing
+        "alphabet": "ACGT"       # letters the table covers (the "blosum62" preset uses amino acids)
+    }
+
+compile() turns it into `rows`, a table of tables where
+rows[read_base][genome_base] is the pair score (a mismatch for characters the
+model does not know). Every scorer indexes it once per base, so a full matrix
+costs the same per base as the old match/mismatch constants. dense() gives the
+same scores as a 256x256 numpy array for scoring every offset at once.
+"""
+import json
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+BASES = "ACGT"
+TRANSITIONS = frozenset(("AG", "GA", "CT", "TC"))
+IUPAC = {
+    "A": "A", "C": "C", "G": "G", "T": "T",
+    "R": "AG", "Y": "CT", "S": "CG", "W": "AT", "K": "GT", "M": "AC",
+    "B": "CGT", "D": "AGT", "H": "ACT", "V": "ACG", "N": "ACGT",
+}
+
+AMINO_ACIDS = "ARNDCQEGHILKMFPSTWYV"
+
+# BLOSUM62, rows and columns in AMINO_ACIDS order
+BLOSUM62_ROWS = """
+ 4 -1 -2 -2  0 -1 -1  0 -2 -1 -1 -1 -1 -2 -1  1  0 -3 -2  0
+-1  5  0 -2 -3  1  0 -2  0 -3 -2  2 -1 -3 -2 -1 -1 -3 -2 -3
+-2  0  6  1 -3  0  0  0  1 -3 -3  0 -2 -3 -2  1  0 -4 -2 -3
+-2 -2  1  6 -3  0  2 -1 -1 -3 -4 -1 -3 -3 -1  0 -1 -4 -3 -3
+ 0 -3 -3 -3  9 -3 -4 -3 -3 -1 -1 -3 -1 -2 -3 -1 -1 -2 -2 -1
+-1  1  0  0 -3  5  2 -2  0 -3 -2  1  0 -3 -1  0 -1 -2 -1 -2
+-1  0  0  2 -4  2  5 -2  0 -3 -3  1 -2 -3 -1  0 -1 -3 -2 -2
+ 0 -2  0 -1 -3 -2 -2  6 -2 -4 -4 -2 -3 -3 -2  0 -2 -2 -3 -3
+-2  0  1 -1 -3  0  0 -2  8 -3 -3 -1 -2 -1 -2 -1 -2 -2  2 -3
+-1 -3 -3 -3 -1 -3 -3 -4 -3  4  2 -3  1  0 -3 -2 -1 -3 -1  3
+-1 -2 -3 -4 -1 -2 -3 -4 -3  2  4 -2  2  0 -3 -2 -1 -2 -1  1
+-1  2  0 -1 -3  1  1 -2 -1 -3 -2  5 -1 -3 -1  0 -1 -3 -2 -2
+-1 -1 -2 -3 -1  0 -2 -3 -2  1  2 -1  5  0 -2 -1 -1 -1 -1  1
+-2 -3 -3 -3 -2 -3 -3 -3 -1  0  0 -3  0  6 -4 -2 -2  1  3 -1
+-1 -2 -2 -1 -3 -1 -1 -2 -2 -3 -3 -1 -2 -4  7 -1 -1 -4 -3 -2
+ 1 -1  1  0 -1  0  0  0 -1 -2 -2  0 -1 -2 -1  4  1 -3 -2 -2
+ 0 -1  0 -1 -1 -1 -1 -2 -2 -1 -1 -1 -1 -2 -1  1  5 -2 -2  0
+-3 -3 -4 -4 -2 -2 -3 -2 -2 -3 -2 -3 -1  1 -4 -3 -2 11  2 -3
+-2 -2 -2 -3 -2 -1 -2 -3  2 -1 -1 -2 -1  3 -3 -2 -2  2  7 -1
+ 0 -3 -3 -3 -1 -2 -2 -3 -3  3  1 -2  1 -1 -2 -2  0 -3 -1  4
+"""
+BLOSUM62 = {
+    a + b: int(score)
+    for a, line in zip(AMINO_ACIDS, BLOSUM62_ROWS.split("\n")[1:])
+    for b, score in zip(AMINO_ACIDS, line.split())
+}
+
+PRESETS = {
+    "simple": {"name": "simple", "match": 1, "mismatch": -1,
+               "gap_opening": -2, "gap_extension": -1},
+    "transitions": {"name": "transitions", "match": 1, "mismatch": -1,
+                    "transition": -1, "transversion": -2,
+                    "gap_opening": -2, "gap_extension": -1},
+    "iupac": {"name": "iupac", "match": 1, "mismatch": -1,
+              "gap_opening": -2, "gap_extension": -1, "iupac": True},
+    "semiglobal": {"name": "semiglobal", "match": 1, "mismatch": -1,
+                   "gap_opening": -2, "gap_extension": -1, "end_gaps_free": True},
+    # Protein mode; -4 (the matrix minimum) for unknown letters, BLAST's default gap costs
+    "blosum62": {"name": "blosum62", "alphabet": AMINO_ACIDS, "matrix": BLOSUM62,
+                 "match": 4, "mismatch": -4, "gap_opening": -11, "gap_extension": -1},
+}
+
+
+class Table(dict):
+    """A dict that returns `default` for missing keys, so unknown characters score as a mismatch."""
+    __slots__ = ("default",)
+
+    def __init__(self, items, default):
+        super().__init__(items)
+        self.default = default
+
+    def __missing__(self, key):
+        return self.default
+
+
+class ScoringModel:
+    def __init__(self, config):
+        self.config = dict(config)
+        self.name = config.get("name", "custom")
+        self.match = config.get("match", 1)
+        self.mismatch = config.get("mismatch", -1)
+        self.gap_opening = config.get("gap_opening", -2)
+        self.gap_extension = config.get("gap_extension", -1)
+        self.end_gaps_free = bool(config.get("end_gaps_free", False))
+        self.compile()
+
+    def base_score(self, a, b):
+        """Score of read letter a against genome letter b, both in the model's alphabet."""
+        pair = a + b
+        matrix = self.config.get("matrix", {})
+        if pair in matrix:
+            return matrix[pair]
+        if pair[::-1] in matrix:
+            return matrix[pair[::-1]]
+        if a == b:
+            return self.match
+        if pair in TRANSITIONS and "transition" in self.config:
+            return self.config["transition"]
+        if pair not in TRANSITIONS and "transversion" in self.config:
+            return self.config["transversion"]
+        return self.mismatch
+
+    def compile(self):
+        if self.config.get("iupac"):
+            codes = IUPAC
+        else:
+            codes = {letter: letter for letter in self.config.get("alphabet", BASES)}
+        self.rows = Table({}, Table({}, self.mismatch))
+        for a, a_bases in codes.items():
+            scores = {}
+            for b, b_bases in codes.items():
+                pairs = [self.base_score(x, y) for x in a_bases for y in b_bases]
+                mean = sum(pairs) / len(pairs)
+                scores[b] = int(mean) if mean == int(mean) else mean
+            self.rows[a] = Table(scores, self.mismatch)
+        # True when scores only depend on whether the bases are equal, as in the
+        # original game; the packed XOR/popcount engine relies on this
+        self.uniform = all(
+            self.rows[a][b] == (self.match if a == b else self.mismatch)
+            for a in self.rows for b in self.rows[a])
+        self._dense = None
+
+    def dense(self):
+        """The score table as a 256x256 numpy array indexed by character codes (needs numpy)."""
+        if self._dense is None:
+            scores = [self.mismatch] + [score for row in self.rows.values() for score in row.values()]
+            dtype = np.int64 if all(float(v).is_integer() for v in scores) else np.float64
+            table = np.full((256, 256), self.mismatch, dtype=dtype)
+            for a, row in self.rows.items():
+                for b, score in row.items():
+                    table[ord(a), ord(b)] = score
+            self._dense = table
+        return self._dense
+
+
+def load_model(source):
+    """Build a ScoringModel from a preset name, a JSON file path, or a dict."""
+    if isinstance(source, dict):
+        return ScoringModel(source)
+    if source in PRESETS:
+        return ScoringModel(PRESETS[source])
+    with open(source) as f:
+        return ScoringModel(json.load(f))
@@ -0,0 +1,131 @@
+"""
+k-mer seed index for fast read placement on large genomes (a mini BLAST).
+
+The exhaustive search in alignment.find_optimal_position() scores the read at
+every offset, which is fine for the 250-base puzzles but takes seconds on a
+million-base genome. Here the genome's k-mers are indexed once; the read's
+k-mers are looked up to find seed hits, the hits are tallied by diagonal
+(genome position minus read position), and only the best-supported diagonals
+are extended by scoring a small band of offsets around them.
+
+With numpy the index is a sorted array of 2-bit packed k-mer codes searched
+with searchsorted; without it a dict of k-mer -> positions is used.
+"""
+from collections import Counter
+
+import alignment
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+SEED_K = 11                # Seed length; 4**11 codes keeps random hits rare on a 1M genome
+MAX_SEED_HITS = 64         # Seeds occurring more often than this are repeats and ignored
+MAX_CANDIDATES = 16        # Diagonals extended per search
+DIAGONAL_BAND = 8          # Offsets scored either side of a candidate diagonal (covers the gaps)
+EXHAUSTIVE_LIMIT = 5_000   # Genomes up to this length are simply searched exhaustively
+VALID_BASES = frozenset("ATGC")
+
+if np is not None:
+    BASE_CODES = np.full(256, 4, dtype=np.uint8)
+    for code, base in enumerate(b"ACGT"):
+        BASE_CODES[base] = code
+        BASE_CODES[base + 32] = code  # lower case
+
+
+def kmer_codes(seq, k):
+    """2-bit packed codes of every k-mer in seq, and a mask of those made only of A/C/G/T."""
+    n = len(seq) - k + 1
+    if n <= 0:
+        return np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=bool)
+    values = BASE_CODES[np.frombuffer(seq.encode("ascii"), dtype=np.uint8)]
+    invalid = np.concatenate(([0], np.cumsum(values == 4)))
+    valid = invalid[k:] - invalid[:n] == 0
+    bits = (values & 3).astype(np.uint64)
+    codes = np.zeros(n, dtype=np.uint64)
+    for j in range(k):
+        codes = (codes << np.uint64(2)) | bits[j:j + n]
+    return codes, valid
+
+
+class KmerIndex:
+    def __init__(self, genome_seq, k=SEED_K):
+        self.genome_seq = genome_seq
+        self.k = k
+        if np is not None:
+            codes, valid = kmer_codes(genome_seq, k)
+            positions = np.flatnonzero(valid)
+            order = np.argsort(codes[positions], kind="stable")
+            self._positions = positions[order]
+            self._codes = codes[positions][order]
+        else:
+            self._table = {}
+            for pos in range(len(genome_seq) - k + 1):
+                kmer = genome_seq[pos:pos + k]
+                if VALID_BASES.issuperset(kmer):
+                    self._table.setdefault(kmer, []).append(pos)
+
+    def diagonals(self, player_seq):
+        """Return [(diagonal, seed count), ...] for the read, best supported first."""
+        k = self.k
+        counts = Counter()
+        if np is not None:
+            codes, valid = kmer_codes(player_seq, k)
+            offsets = np.flatnonzero(valid)
+            lo = np.searchsorted(self._codes, codes[offsets], side="left")
+            hi = np.searchsorted(self._codes, codes[offsets], side="right")
+            for offset, start, end in zip(offsets.tolist(), lo.tolist(), hi.tolist()):
+                if 0 < end - start <= MAX_SEED_HITS:
+                    counts.update((self._positions[start:end] - offset).tolist())
+        else:
+            for offset in range(len(player_seq) - k + 1):
+                hits = self._table.get(player_seq[offset:offset + k], ())
+                if len(hits) <= MAX_SEED_HITS:
+                    counts.update(pos - offset for pos in hits)
+        return counts.most_common()
+
+
+_cached_index = None
+
+
+def index_for(genome_seq):
+    """The seed index for genome_seq, built on first use and kept until the genome changes."""
+    global _cached_index
+    if _cached_index is None or _cached_index.genome_seq is not genome_seq:
+        _cached_index = KmerIndex(genome_seq)
+    return _cached_index
+
+
+def cached_index(genome_seq):
+    """The seed index for genome_seq if index_for() has already built it, else None."""
+    if _cached_index is not None and _cached_index.genome_seq is genome_seq:
+        return _cached_index
+    return None
+
+
+def find_optimal_position(player_seq, genome_seq):
+    """
+    Drop-in replacement for alignment.find_optimal_position() that only scores
+    offsets near well-seeded diagonals. Falls back to the exhaustive search for
+    small genomes and for reads with no usable seed.
+    """
+    if len(genome_seq) <= EXHAUSTIVE_LIMIT:
+        return alignment.find_optimal_position(player_seq, genome_seq)
+    last_position = len(genome_seq) - (len(player_seq) + 4)
+    candidates = index_for(genome_seq).diagonals(player_seq)[:MAX_CANDIDATES]
+    positions = set()
+    for diagonal, _ in candidates:
+        positions.update(range(max(0, diagonal - DIAGONAL_BAND),
+                               min(last_position, diagonal + DIAGONAL_BAND) + 1))
+    if not positions:
+        return alignment.find_optimal_position(player_seq, genome_seq)
+
+    max_score = float('-inf')
+    best_position = 0
+    for pos in sorted(positions):
+        score = alignment.calculate_score(player_seq, genome_seq, pos)
+        if score > max_score:
+            max_score = score
+            best_position = pos
+    return best_position, max_score
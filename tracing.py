@@ -0,0 +1,141 @@
+"""
+Lightweight tracing for the game loop.
+
+Hot functions are wrapped with @traced and ad-hoc regions with `with span(...)`.
+While no capture is running both reduce to a single flag check. A capture
+records spans into a bounded ring buffer for a chosen number of frames and then
+writes either a Chrome trace-event JSON (open it in chrome://tracing or
+Perfetto) or a cProfile .prof file.
+"""
+import cProfile
+import functools
+import json
+import time
+from collections import deque
+
+TRACE_CAPACITY = 200_000  # Spans kept per capture; older ones are dropped first
+TRACE_FRAMES = 300        # Frames recorded per capture (about 5 seconds at 60 fps)
+
+
+class _NoSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "start")
+
+    def __init__(self, tracer, name):
+        self.tracer = tracer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.add(self.name, self.start, time.perf_counter())
+        return False
+
+
+class Tracer:
+    def __init__(self, capacity=TRACE_CAPACITY):
+        self.enabled = False
+        self.spans = deque(maxlen=capacity)  # (name, start, end) in perf_counter seconds
+        self.mode = None
+        self.path = None
+        self.frames_left = 0
+        self._frame_start = None
+        self._profiler = None
+
+    def add(self, name, start, end):
+        if self.enabled:
+            self.spans.append((name, start, end))
+
+    def span(self, name):
+        return _Span(self, name) if self.enabled else _NO_SPAN
+
+    def start_capture(self, frames=TRACE_FRAMES, mode="chrome", path=None):
+        """Record the next `frames` frames, then write them to path."""
+        if self.enabled:
+            return
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        self.mode = mode
+        self.path = path or (f"trace-{stamp}.json" if mode == "chrome" else f"profile-{stamp}.prof")
+        self.frames_left = frames
+        self.spans.clear()
+        self._frame_start = None
+        self.enabled = True
+        if mode == "cprofile":
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        print(f"Tracing {frames} frames to {self.path}")
+
+    def frame(self):
+        """Call once per game-loop iteration; finishes the capture when enough frames are in."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self._frame_start is not None:
+            self.add("frame", self._frame_start, now)
+            self.frames_left -= 1
+            if self.frames_left <= 0:
+                self.finish()
+                return
+        self._frame_start = now
+
+    def finish(self):
+        self.enabled = False
+        if self._profiler is not None:
+            self._profiler.disable()
+            self._profiler.dump_stats(self.path)
+            self._profiler = None
+        else:
+            self.write_chrome_trace(self.path)
+        print(f"Wrote {self.path}")
+
+    def write_chrome_trace(self, path):
+        if not self.spans:
+            origin = 0
+        else:
+            origin = min(start for _, start, _ in self.spans)
+        events = [
+            {"name": name, "ph": "X", "pid": 1, "tid": 1,
+             "ts": (start - origin) * 1e6, "dur": (end - start) * 1e6}
+            for name, start, end in self.spans
+        ]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+# Shared tracer used by the game
+tracer = Tracer()
+
+
+def span(name):
+    """Context manager recording `name` while a capture is running."""
+    return tracer.span(name)
+
+
+def traced(fn=None, name=None):
+    """Decorator that records each call of fn as a span while a capture is running."""
+    if fn is None:
+        return lambda f: traced(f, name)
+    label = name or fn.__name__
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not tracer.enabled:
+            return fn(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            tracer.add(label, start, time.perf_counter())
+    return wrapper
@@ -0,0 +1,276 @@
+"""
+Puzzle validator: the true optimum of a puzzle, and batch vetting in parallel.
+
+The player may only insert gaps into the read and slide it along the genome,
+so the best achievable score is a semi-global alignment: every read base is
+used in order, the read may start anywhere on the genome, and genome bases
+skipped between read bases cost the affine gap penalty calculate_score()
+charges under the active scoring model. optimal_alignment() solves that exactly with a small dynamic program
+and returns the placement and gapped read that reach it, so a puzzle's
+advertised maximum is no longer a guess. With numpy each read base is one
+array step over the genome: the best gap ending at every position is a running
+maximum (np.maximum.accumulate) instead of a loop, which also keeps solving
+both strands cheap. Models with fractional scores keep the exact list version.
+
+validate_puzzle() adds tags on top:
+- "ambiguous": another placement far from the best scores within a margin of it.
+- "score_low" / "score_high": the optimum falls outside the target range.
+- "no_gaps_needed": the optimum needs no gaps, so the puzzle is trivial.
+
+Run as a script to vet thousands of seeded puzzles on a process pool:
+    python validator.py --count 10000 --min-score 30 --max-score 70 --out puzzles.jsonl
+"""
+import argparse
+import json
+import os
+import random
+import time
+from contextlib import nullcontext
+
+import alignment
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+AMBIGUITY_MARGIN = 4       # An alternative this close to the optimum makes the puzzle ambiguous
+PROGRESS_INTERVAL = 1.0    # Seconds between progress lines in batch mode
+
+NEG_INF = float('-inf')
+
+
+def optimal_alignment(player_seq, genome_seq):
+    """
+    Return (score, alignment_start, gapped_read, end_scores) for the best
+    arrangement of the read's bases on the genome. end_scores[j] is the best
+    score with the last read base on genome position j.
+    """
+    read = player_seq.replace('-', '')
+    n, m = len(read), len(genome_seq)
+    if n == 0 or n > m:
+        return NEG_INF, 0, player_seq, []
+    model = alignment.scoring_model
+    gap_open, gap_extend = model.gap_opening, model.gap_extension
+    if np is not None and model.dense().dtype.kind == 'i':
+        # Integer scores stay exact in float64, so the traceback's equality tests still hold
+        rows, gapped_rows = _dp_arrays(read, genome_seq, model)
+        placed = rows[-1]
+        end = int(np.argmax(placed))  # First of any ties, as below
+        score = int(placed[end])
+        return _traceback(read, rows, gapped_rows, end, score, gap_open) + (placed.tolist(),)
+
+    # Row i holds the states after placing read base i on genome position j:
+    # placed[j] ends with the base on j, gapped[j] ends with a gap covering j.
+    scores = model.rows[read[0]]
+    placed = [scores[g] for g in genome_seq]
+    rows = [placed]
+    gapped_rows = []
+    for i in range(1, n):
+        scores = model.rows[read[i]]
+        gapped = [NEG_INF] * m
+        for j in range(1, m):
+            open_score = placed[j - 1] + gap_open
+            extend_score = gapped[j - 1] + gap_extend
+            gapped[j] = open_score if open_score >= extend_score else extend_score
+        gapped_rows.append(gapped)
+        new = [NEG_INF] * m
+        for j in range(i, m):
+            best = placed[j - 1] if placed[j - 1] >= gapped[j - 1] else gapped[j - 1]
+            new[j] = best + scores[genome_seq[j]]
+        placed = new
+        rows.append(placed)
+
+    end = max(range(m), key=lambda j: (placed[j], -j))
+    score = placed[end]
+    return _traceback(read, rows, gapped_rows, end, score, gap_open) + (placed,)
+
+
+def _dp_arrays(read, genome_seq, model):
+    """The rows of optimal_alignment()'s dynamic program as numpy arrays."""
+    table = model.dense()
+    genome = np.frombuffer(genome_seq.encode('ascii'), dtype=np.uint8)
+    m = len(genome)
+    # A gap from k to j costs gap_open + (j - 1 - k) * gap_extension, so the best
+    # gap ending at j is a running maximum of placed[k] - k * gap_extension
+    extension = np.arange(m) * float(model.gap_extension)
+    placed = table[ord(read[0])][genome].astype(np.float64)
+    rows = [placed]
+    gapped_rows = []
+    for i in range(1, len(read)):
+        gapped = np.empty(m)
+        gapped[0] = NEG_INF
+        gapped[1:] = np.maximum.accumulate(placed - extension)[:-1] + model.gap_opening + extension[:-1]
+        gapped_rows.append(gapped)
+        new = np.full(m, NEG_INF)
+        new[i:] = np.maximum(placed[i - 1:m - 1], gapped[i - 1:m - 1]) + table[ord(read[i])][genome[i:]]
+        placed = new
+        rows.append(placed)
+    return rows, gapped_rows
+
+
+def _traceback(read, rows, gapped_rows, end, score, gap_open):
+    """(score, alignment_start, gapped_read) from the last read base on genome position end."""
+    n = len(read)
+    # Trace back from the last read base, rebuilding the gapped read
+    out = [read[n - 1]]
+    j = end
+    for i in range(n - 1, 0, -1):
+        prev_placed = rows[i - 1][j - 1]
+        gapped = gapped_rows[i - 1]
+        if prev_placed >= gapped[j - 1]:
+            j -= 1
+        else:
+            j -= 1
+            while True:
+                out.append('-')
+                if rows[i - 1][j - 1] + gap_open == gapped[j]:
+                    j -= 1
+                    break
+                j -= 1
+        out.append(read[i - 1])
+    gapped_read = ''.join(reversed(out))
+    return score, j, gapped_read
+
+
+class PuzzleReport:
+    __slots__ = ("optimal_score", "optimal_start", "solution", "breakdown", "ungapped_score",
+                 "alternatives", "tags", "strand")
+
+    def __init__(self, optimal_score, optimal_start, solution, breakdown, ungapped_score,
+                 alternatives, tags, strand='+'):
+        self.optimal_score = optimal_score
+        self.optimal_start = optimal_start
+        self.solution = solution            # The read with the gaps that reach the optimum
+        self.breakdown = breakdown          # alignment.score_breakdown() of the solution
+        self.ungapped_score = ungapped_score
+        self.alternatives = alternatives
+        self.tags = tags
+        self.strand = strand                # '-' when the solution is the read's reverse complement
+
+    @property
+    def accepted(self):
+        return not self.tags
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def validate_puzzle(genome_seq, player_seq, min_score=None, max_score=None,
+                    margin=AMBIGUITY_MARGIN, both_strands=False):
+    """
+    Solve and tag a puzzle. With both_strands the read may also be placed as its
+    reverse complement; the report's strand says which one wins, and a
+    near-optimal placement on the other strand counts as an alternative.
+    """
+    score, start, solution, end_scores = optimal_alignment(player_seq, genome_seq)
+    strand, oriented, other_ends = '+', player_seq, []
+    if both_strands:
+        reverse_seq = alignment.reverse_complement(player_seq)
+        rc_score, rc_start, rc_solution, rc_ends = optimal_alignment(reverse_seq, genome_seq)
+        if rc_score > score:
+            other_ends = end_scores
+            score, start, solution, end_scores = rc_score, rc_start, rc_solution, rc_ends
+            strand, oriented = '-', reverse_seq
+        else:
+            other_ends = rc_ends
+    ungapped = alignment.calculate_score(oriented, genome_seq, start)
+    read_length = len(player_seq.replace('-', ''))
+    best_end = start + len(solution) - 1
+    # Alternatives are ends that could not be the same placement shifted by a few gaps
+    alternatives = sum(1 for j, s in enumerate(end_scores)
+                       if s >= score - margin and abs(j - best_end) > read_length // 2)
+    alternatives += sum(1 for s in other_ends if s >= score - margin)
+    tags = []
+    if alternatives:
+        tags.append("ambiguous")
+    if min_score is not None and score < min_score:
+        tags.append("score_low")
+    if max_score is not None and score > max_score:
+        tags.append("score_high")
+    if '-' not in solution:
+        tags.append("no_gaps_needed")
+    breakdown = alignment.score_breakdown(solution, genome_seq, start)
+    return PuzzleReport(score, start, solution, breakdown, ungapped, alternatives, tags, strand)
+
+
+def generate_seeded_puzzle(seed, genome_length=250):
+    """The puzzle the game generates from seed with random DNA (the default settings)."""
+    rng = random.Random(seed)
+    genome_seq = alignment.generate_dna_sequence(genome_length, seed=rng.getrandbits(64))
+    return genome_seq, alignment.generate_player_sequence_from_genome(genome_seq, rng=rng)
+
+
+def _vet(job):
+    seed, genome_length, min_score, max_score = job
+    genome_seq, player_seq = generate_seeded_puzzle(seed, genome_length)
+    report = validate_puzzle(genome_seq, player_seq, min_score, max_score)
+    return seed, genome_seq, player_seq, report.as_dict()
+
+
+def vet_puzzles(count, first_seed=0, genome_length=250, min_score=None, max_score=None,
+                workers=None, out=None):
+    """
+    Validate `count` seeded puzzles on a process pool; returns a summary dict.
+    Without multiprocessing (the web build has no _multiprocessing) they are
+    vetted one after another in this process.
+    """
+    try:
+        # Imported here so that importing the validator never needs _multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+    except ImportError:
+        ProcessPoolExecutor = None
+    jobs = [(first_seed + i, genome_length, min_score, max_score) for i in range(count)]
+    tag_counts = {}
+    scores = {}
+    accepted = 0
+    start = last_report = time.perf_counter()
+    out_file = open(out, "w") if out else None
+    try:
+        executor = ProcessPoolExecutor(max_workers=workers) if ProcessPoolExecutor else nullcontext()
+        with executor:
+            if ProcessPoolExecutor:
+                chunksize = max(1, count // ((workers or os.cpu_count() or 1) * 16))
+                results = executor.map(_vet, jobs, chunksize=chunksize)
+            else:
+                results = map(_vet, jobs)
+            for done, (seed, genome_seq, player_seq, report) in enumerate(results, 1):
+                scores[report["optimal_score"]] = scores.get(report["optimal_score"], 0) + 1
+                for tag in report["tags"]:
+                    tag_counts[tag] = tag_counts.get(tag, 0) + 1
+                if not report["tags"]:
+                    accepted += 1
+                    if out_file:
+                        out_file.write(json.dumps({"seed": seed, "genome": genome_seq,
+                                                   "read": player_seq, **report}) + "\n")
+                now = time.perf_counter()
+                if now - last_report >= PROGRESS_INTERVAL or done == count:
+                    last_report = now
+                    print(f"{done}/{count} vetted, {accepted} accepted, "
+                          f"{done / (now - start):,.0f} puzzles/s")
+    finally:
+        if out_file:
+            out_file.close()
+    return {
+        "count": count,
+        "accepted": accepted,
+        "seconds": time.perf_counter() - start,
+        "tags": tag_counts,
+        "scores": dict(sorted(scores.items())),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Vet generated puzzles against their true optimum")
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--genome-length", type=int, default=250)
+    parser.add_argument("--min-score", type=int)
+    parser.add_argument("--max-score", type=int)
+    parser.add_argument("--workers", type=int, help="processes (default: one per CPU)")
+    parser.add_argument("--out", help="write accepted puzzles as JSON lines")
+    args = parser.parse_args()
+
+    summary = vet_puzzles(args.count, args.first_seed, args.genome_length,
+                          args.min_score, args.max_score, args.workers, args.out)
+    print(json.dumps(summary, indent=2))
@@ -0,0 +1,61 @@
+"""
+Scrolling viewport over the genome rows.
+
+The genome is laid out in rows of GENOME_ROW_LENGTH bases, but only
+NUM_GENOME_ROWS fit on screen. The viewport keeps the read and the cursor in
+view and eases towards that target so the board glides instead of jumping.
+draw_sequences() only renders the rows the viewport says are visible, so the
+per-frame cost does not depend on the genome length.
+"""
+import math
+
+SCROLL_SPEED = 12.0  # Higher is snappier; fraction of the remaining distance covered per second
+
+
+class GenomeViewport:
+    def __init__(self, row_length, visible_rows):
+        self.row_length = row_length
+        self.visible_rows = visible_rows
+        self.row = 0.0          # Top visible row, fractional while scrolling
+        self.target_row = 0
+        self.total_rows = visible_rows
+        self._last_time = None
+
+    def reset(self, genome_length):
+        self.total_rows = max(1, math.ceil(genome_length / self.row_length))
+        self.row = 0.0
+        self.target_row = 0
+        self._last_time = None
+
+    def follow(self, alignment_start, read_length, cursor=None):
+        """Pick the top row that keeps the read (and the cursor, if set) on screen."""
+        first = alignment_start // self.row_length
+        last = (alignment_start + max(read_length, 1) - 1) // self.row_length
+        if cursor is not None:
+            first = min(first, cursor // self.row_length)
+            last = max(last, cursor // self.row_length)
+
+        target = self.target_row
+        if first < target:
+            target = first
+        elif last >= target + self.visible_rows:
+            target = last - self.visible_rows + 1
+        max_row = max(0, self.total_rows - self.visible_rows)
+        self.target_row = min(max(target, 0), max_row)
+
+    def update(self, current_time):
+        """Ease the scroll position towards the target row."""
+        if self._last_time is None:
+            self._last_time = current_time
+            self.row = float(self.target_row)
+            return
+        dt = (current_time - self._last_time) / 1000
+        self._last_time = current_time
+        # Long jumps skip ahead so the last screenful is still animated
+        distance = self.target_row - self.row
+        if abs(distance) > self.visible_rows:
+            self.row = self.target_row - math.copysign(self.visible_rows, distance)
+        step = 1 - math.exp(-SCROLL_SPEED * dt)
+        self.row += (self.target_row - self.row) * step
+        if abs(self.target_row - self.row) < 0.01:
+            self.row = float(self.target_row)